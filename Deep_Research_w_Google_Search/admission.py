@@ -0,0 +1 @@
+../Trader_Agents/admission.py
\ No newline at end of file
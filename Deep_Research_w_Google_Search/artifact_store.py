@@ -0,0 +1,111 @@
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+from typing import Dict, Optional
+from dotenv import load_dotenv
+from agents import Agent
+
+load_dotenv(override=True)
+
+# With ARTIFACT_STORE set to a file, every stage of a research run (the search plan, each search
+# summary, the report) is stored there under its run id and a hash of everything that produced it,
+# so a resumed run (same run id, by default the same query) skips the stages that already finished. Checkpoints expire after
+# ARTIFACT_TTL_SECONDS, by default the search cache's query TTL, so they never outlive the search
+# results they were built from. Off by default.
+ARTIFACT_STORE = os.getenv("ARTIFACT_STORE", "off")
+ARTIFACT_TTL_SECONDS = int(os.getenv("ARTIFACT_TTL_SECONDS", os.getenv("SEARCH_CACHE_QUERY_TTL_SECONDS", "21600")))
+
+
+def query_run_id(query: str) -> str:
+    """Default run id of a query: case, surrounding punctuation and whitespace do not change it."""
+    normalized = " ".join(query.casefold().split()).strip(" .?!")
+    return hashlib.sha256(normalized.encode()).hexdigest()[:16]
+
+
+def artifact_key(stage: str, agent: Agent, input: str, run_id: str) -> str:
+    """Hash of the run id and a stage's inputs: the agent's name, model, instructions, output type and input."""
+    output_type = getattr(agent.output_type, "__name__", str(agent.output_type))
+    payload = json.dumps(
+        {
+            "run": run_id, "stage": stage, "agent": agent.name, "model": str(agent.model),
+            "instructions": str(agent.instructions), "output": output_type, "input": input,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ArtifactStore:
+    """SQLite table of stage outputs, keyed by run id and the content hash of their inputs."""
+
+    def __init__(self, db_path: str = ARTIFACT_STORE, ttl_seconds: int = ARTIFACT_TTL_SECONDS):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.enabled = db_path != "off"
+        if self.enabled:
+            with sqlite3.connect(db_path) as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS artifacts (key TEXT PRIMARY KEY, run_id TEXT, stage TEXT, input TEXT, output TEXT, created_at DATETIME)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS artifacts_created ON artifacts (created_at)")
+                conn.commit()
+
+    @property
+    def cutoff(self) -> str:
+        """sqlite datetime modifier for the creation time of the oldest live checkpoint."""
+        return f"-{self.ttl_seconds} seconds"
+
+    def get(self, key: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute(
+                "SELECT output FROM artifacts WHERE key = ? AND created_at > datetime('now', ?)", (key, self.cutoff)
+            ).fetchone()
+        return row[0] if row else None
+
+    def put(self, key: str, run_id: str, stage: str, input: str, output: str) -> None:
+        if not self.enabled:
+            return
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("DELETE FROM artifacts WHERE created_at <= datetime('now', ?)", (self.cutoff,))
+            conn.execute(
+                "INSERT OR REPLACE INTO artifacts (key, run_id, stage, input, output, created_at) VALUES (?, ?, ?, ?, ?, datetime('now'))",
+                (key, run_id, stage, input, output),
+            )
+            conn.commit()
+
+    def counts(self) -> Dict[str, int]:
+        if not self.enabled:
+            return {}
+        with sqlite3.connect(self.db_path) as conn:
+            return dict(conn.execute(
+                "SELECT stage, COUNT(*) FROM artifacts WHERE created_at > datetime('now', ?) GROUP BY stage", (self.cutoff,)
+            ).fetchall())
+
+    def export(self, path: str) -> int:
+        """Write every live artifact as a JSON line (run, stage, input, output), e.g. as an offline benchmark corpus."""
+        with sqlite3.connect(self.db_path) as conn, open(path, "w") as f:
+            rows = conn.execute(
+                "SELECT run_id, stage, input, output, created_at FROM artifacts WHERE created_at > datetime('now', ?) ORDER BY created_at",
+                (self.cutoff,),
+            ).fetchall()
+            for run_id, stage, input, output, created_at in rows:
+                f.write(json.dumps({"run_id": run_id, "stage": stage, "input": input, "output": output, "created_at": created_at}) + "\n")
+        return len(rows)
+
+
+store = ArtifactStore()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Research artifact store")
+    parser.add_argument("--export", help="write all artifacts to this JSONL file")
+    cli = parser.parse_args()
+    if not store.enabled:
+        parser.error("set ARTIFACT_STORE to the checkpoint file")
+    print(store.counts())
+    if cli.export:
+        print(f"Exported {store.export(cli.export)} artifacts to {cli.export}")
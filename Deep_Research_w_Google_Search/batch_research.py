@@ -0,0 +1,139 @@
+"""Run deep research for every query in a file, many at once, writing each report as it finishes.
+
+Queries are read one per line (blank lines and lines starting with # are ignored). Up to
+--parallel pipelines run at the same time. Across all of them, at most --searches searches and
+--llm-calls model requests are in flight; the per-provider rate limits of admission.py and the
+search cache are shared as well, so overlapping queries reuse each other's searches and pages.
+
+Every finished report is written to the output directory as <slug>-<hash>.md (the markdown) and
+.json (the full ReportData plus run details), and a line is appended to manifest.jsonl. Queries that
+already have a report are skipped, so re-running the same command after an interruption resumes
+where it stopped; failed queries are retried. With ARTIFACT_STORE set, a retried query also skips the
+stages it finished within ARTIFACT_TTL_SECONDS.
+
+Usage:
+    python batch_research.py queries.txt
+    python batch_research.py queries.txt --out reports --parallel 4 --searches 6 --llm-calls 8
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+from typing import Any, AsyncIterator, List
+from agents import Model, ModelProvider, RunConfig
+from research_manager import RUN_CONFIG, ReportDelta, ResearchManager
+
+
+class BoundedModel(Model):
+    """Model wrapper holding one of the batch's LLM slots for the duration of every request."""
+
+    def __init__(self, model: Model, slots: asyncio.Semaphore):
+        self.model = model
+        self.slots = slots
+
+    async def get_response(self, *args, **kwargs):
+        async with self.slots:
+            return await self.model.get_response(*args, **kwargs)
+
+    async def stream_response(self, *args, **kwargs) -> AsyncIterator[Any]:
+        async with self.slots:
+            async for event in self.model.stream_response(*args, **kwargs):
+                yield event
+
+
+class BoundedProvider(ModelProvider):
+    def __init__(self, provider: ModelProvider, slots: asyncio.Semaphore):
+        self.provider = provider
+        self.slots = slots
+
+    def get_model(self, model_name: str | None) -> Model:
+        return BoundedModel(self.provider.get_model(model_name), self.slots)
+
+
+def read_queries(path: str) -> List[str]:
+    with open(path) as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+def report_name(query: str) -> str:
+    slug = re.sub(r"[^a-z0-9]+", "-", query.lower()).strip("-")[:50]
+    return f"{slug}-{hashlib.sha256(query.encode()).hexdigest()[:8]}"
+
+
+def write_atomically(path: str, content: str) -> None:
+    # A report interrupted mid-write must not look finished on resume
+    with open(path + ".tmp", "w") as f:
+        f.write(content)
+    os.replace(path + ".tmp", path)
+
+
+async def research(query: str, out_dir: str, manager: ResearchManager) -> dict:
+    start = time.perf_counter()
+    statuses = []
+    async for chunk in manager.run(query):
+        if not isinstance(chunk, ReportDelta):
+            statuses.append(chunk)
+    name = report_name(query)
+    write_atomically(os.path.join(out_dir, name + ".json"), json.dumps({
+        "query": query,
+        "report": manager.report.model_dump(),
+        "seconds": round(time.perf_counter() - start, 1),
+        "statuses": statuses[:-1],
+    }, indent=2))
+    write_atomically(os.path.join(out_dir, name + ".md"), manager.report.markdown_report)
+    return {"query": query, "status": "done", "report": name + ".md", "seconds": round(time.perf_counter() - start, 1)}
+
+
+async def run_batch(queries: List[str], out_dir: str, parallel: int, searches: int, llm_calls: int, deadline: float) -> List[dict]:
+    os.makedirs(out_dir, exist_ok=True)
+    queries = list(dict.fromkeys(queries))
+    todo = [q for q in queries if not os.path.exists(os.path.join(out_dir, report_name(q) + ".md"))]
+    print(f"{len(queries) - len(todo)} of {len(queries)} queries already have a report; running {len(todo)}")
+    pipelines = asyncio.Semaphore(parallel)
+    search_slots = asyncio.Semaphore(searches)
+    run_config = RunConfig(model_provider=BoundedProvider(RUN_CONFIG.model_provider, asyncio.Semaphore(llm_calls)))
+    manifest = open(os.path.join(out_dir, "manifest.jsonl"), "a")
+    finished = 0
+
+    async def one(query: str) -> dict:
+        nonlocal finished
+        async with pipelines:
+            manager = ResearchManager(
+                deadline=deadline, stream=False, email=False, search_slots=search_slots, run_config=run_config
+            )
+            try:
+                entry = await research(query, out_dir, manager)
+            except Exception as e:
+                entry = {"query": query, "status": "failed", "error": str(e)}
+        finished += 1
+        manifest.write(json.dumps(entry) + "\n")
+        manifest.flush()
+        print(f"[{finished}/{len(todo)}] {entry['status']}: {query}")
+        return entry
+
+    try:
+        return await asyncio.gather(*(one(query) for query in todo))
+    finally:
+        manifest.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batch deep research over a file of queries")
+    parser.add_argument("queries", help="file with one query per line")
+    parser.add_argument("--out", default="reports", help="directory for reports and manifest.jsonl")
+    parser.add_argument("--parallel", type=int, default=4, help="research pipelines running at once")
+    parser.add_argument("--searches", type=int, default=6, help="searches in flight across all pipelines")
+    parser.add_argument("--llm-calls", type=int, default=8, help="model requests in flight across all pipelines")
+    # Searches of one query may wait for slots held by others, so the interactive deadline is too short
+    parser.add_argument("--search-deadline", type=float, default=3600, help="seconds for all searches of one query")
+    cli = parser.parse_args()
+
+    start = time.perf_counter()
+    results = asyncio.run(run_batch(read_queries(cli.queries), cli.out, cli.parallel, cli.searches, cli.llm_calls, cli.search_deadline))
+    failed = [r for r in results if r["status"] != "done"]
+    print(f"{len(results) - len(failed)} reports written, {len(failed)} failed in {time.perf_counter() - start:.0f}s")
+    if failed:
+        print("Re-run the same command to retry the failed queries")
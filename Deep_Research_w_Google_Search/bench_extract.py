@@ -0,0 +1,140 @@
+"""Micro-benchmark of page text extraction on saved and generated HTML pages.
+
+Compares the previous extraction (whole page through BeautifulSoup html.parser, `get_text()`,
+first 2000 characters) with the streaming extractor in `page_text.py`, fed in the same chunks the
+fetcher reads from the network. Reports time per page, how much of the page was read, and how
+many words the 2000-character preview holds (text of adjacent elements glued together, or
+budget spent on whitespace, shows up as fewer words).
+
+Besides the small pages in fixtures/, three large pages are generated at run time with the shapes
+that make full parsing slow: a news article behind ~470 KB of CSS, scripts and JSON state, a docs
+page with a long navigation sidebar, and a script-only single-page-app shell.
+
+Usage:
+    python bench_extract.py                    # fixtures and generated pages
+    python bench_extract.py fixtures/blog_post.html --repeat 50
+"""
+import argparse
+import glob
+import json
+import os
+import random
+import statistics
+import time
+from bs4 import BeautifulSoup
+from page_text import TextExtractor
+
+MAX_CONTENT_CHARS = 2000
+CHUNK_BYTES = 16384
+
+
+WORDS = (
+    "analysts battery bank capacity central chain climate data demand deployment earnings emissions energy expect "
+    "forecast grid growth inflation investors market model outlook policy prices quarter rates regulation report "
+    "research results revenue semiconductor storage supply survey"
+).split()
+
+
+def generated_pages(seed: int = 7) -> dict[str, bytes]:
+    """Large synthetic pages, the same for a given seed."""
+    rng = random.Random(seed)
+
+    def sentence(words: int) -> str:
+        return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+    def paragraph() -> str:
+        return "<p>" + " ".join(sentence(rng.randint(10, 24)) for _ in range(rng.randint(3, 6))) + "</p>"
+
+    def css(rules: int) -> str:
+        return "<style>" + "\n".join(
+            f".c{i} {{ margin: {i % 7}px; padding: {i % 5}px {i % 3}px; color: #{i * 2654435 % 0xFFFFFF:06x}; }}" for i in range(rules)
+        ) + "</style>"
+
+    def js(functions: int) -> str:
+        return "<script>" + "\n".join(
+            f"  var v{i} = function(a,b){{ return (a*{i}+b) % 97 + '{rng.choice(WORDS)}'; }};" for i in range(functions)
+        ) + "</script>"
+
+    def nav(links: int) -> str:
+        return "<nav><ul>" + "".join(
+            f'<li><a href="/section/{i}" class="nav-link c{i}">{rng.choice(WORDS).capitalize()}</a></li>' for i in range(links)
+        ) + "</ul></nav>"
+
+    icon = '<svg width="24" height="24" viewBox="0 0 24 24"><path d="M12 2L2 7l10 5 10-5-10-5z"/><title>icon</title></svg>'
+    state = json.dumps({"items": [{"id": i, "headline": sentence(16), "tags": rng.sample(WORDS, 5)} for i in range(1400)]})
+    news = (
+        '<!DOCTYPE html><html lang="en"><head><meta charset="utf-8"><title>Central bank holds rates as inflation cools</title>\n'
+        + css(2000) + js(2500) + f'<script id="__STATE__" type="application/json">{state}</script>\n'
+        + "</head><body>" + nav(120) + icon * 40
+        + '<article><h1>Central bank holds rates as inflation cools</h1><p class="byline">By Staff &amp; Wire</p>\n'
+        + "".join(paragraph() for _ in range(40)) + "</article>" + js(800) + "</body></html>"
+    )
+    sections = "".join(
+        f"<h2>{sentence(4)}</h2><div><div>{paragraph()}<pre><code>client.put(key, value)  # {rng.choice(WORDS)}</code></pre></div></div>"
+        for _ in range(80)
+    )
+    table = "".join(f"<tr><td>{rng.choice(WORDS)}</td><td>{rng.randint(100, 999)}</td><td>{sentence(8)}</td></tr>" for _ in range(120))
+    docs = (
+        '<!DOCTYPE html><html><head><meta http-equiv="Content-Type" content="text/html; charset=utf-8"><title>Storage API reference</title>\n'
+        + '<link rel="stylesheet" href="/static/docs.css">' + css(260) + "</head><body>\n"
+        + '<div class="layout"><aside>' + nav(160) + '</aside><div class="content"><div class="inner"><div class="section">\n'
+        + "<h1>Storage API reference</h1>\n" + sections
+        + f"<table><thead><tr><th>Key</th><th>Size</th><th>Notes</th></tr></thead><tbody>{table}</tbody></table>\n"
+        + "</div></div></div></div><noscript><p>Enable JavaScript for search.</p></noscript></body></html>"
+    )
+    spa = (
+        "<!doctype html><html><head><title>Dashboard</title>" + js(2500) + "</head>\n"
+        + '<body><div id="root"></div><noscript>You need to enable JavaScript to run this app.</noscript>\n'
+        + js(1500) + "</body></html>"
+    )
+    return {"news_article": news.encode(), "docs_reference": docs.encode(), "spa_shell": spa.encode()}
+
+
+def full_parse(html: bytes) -> tuple[str, int]:
+    return BeautifulSoup(html, "html.parser").get_text()[:MAX_CONTENT_CHARS], len(html)
+
+
+def streaming(html: bytes) -> tuple[str, int]:
+    extractor = TextExtractor(MAX_CONTENT_CHARS)
+    read = 0
+    for start in range(0, len(html), CHUNK_BYTES):
+        chunk = html[start:start + CHUNK_BYTES]
+        read += len(chunk)
+        if extractor.feed_bytes(chunk):
+            break
+    return extractor.text(), read
+
+
+def timed(extract, html: bytes, repeat: int) -> tuple[float, str, int]:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        text, read = extract(html)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), text, read
+
+
+if __name__ == "__main__":
+    here = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Full-DOM vs streaming text extraction on saved pages")
+    parser.add_argument("pages", nargs="*", help="HTML files (default: fixtures/*.html and the generated pages)")
+    parser.add_argument("--repeat", type=int, default=20, help="runs per page (median reported)")
+    cli = parser.parse_args()
+
+    pages = {}
+    for path in cli.pages or sorted(glob.glob(os.path.join(here, "fixtures", "*.html"))):
+        with open(path, "rb") as f:
+            pages[os.path.splitext(os.path.basename(path))[0]] = f.read()
+    if not cli.pages:
+        pages.update(generated_pages())
+
+    print(f"{'page':22} {'size':>8} {'method':10} {'time':>9} {'read':>6} {'chars':>6} {'words':>6}")
+    totals = {"full": 0.0, "streaming": 0.0}
+    for name, html in pages.items():
+        for method, extract in (("full", full_parse), ("streaming", streaming)):
+            seconds, text, read = timed(extract, html, cli.repeat)
+            totals[method] += seconds
+            print(f"{name:22} {len(html) / 1024:6.0f}KB {method:10} {seconds * 1000:7.2f}ms "
+                  f"{read / len(html):6.0%} {len(text):6} {len(text.split()):6}")
+    print(f"total: full {totals['full'] * 1000:.1f}ms, streaming {totals['streaming'] * 1000:.1f}ms "
+          f"({totals['full'] / totals['streaming']:.1f}x)")
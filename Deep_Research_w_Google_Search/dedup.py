@@ -0,0 +1,122 @@
+import hashlib
+import os
+import random
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+# Texts whose estimated Jaccard similarity (over word 3-shingles) reaches DEDUP_THRESHOLD are
+# near-duplicates: a duplicate page preview is dropped, a duplicate search summary is merged into
+# the one kept (only its sentences that add something survive). Set above 1 to disable.
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.5"))
+SHINGLE_WORDS = 3
+PERMUTATIONS = 64
+CHARS_PER_TOKEN = 4  # same estimate as admission.py
+
+PRIME = (1 << 61) - 1
+_rng = random.Random(1729)
+HASH_PARAMS = [(_rng.randrange(1, PRIME), _rng.randrange(0, PRIME)) for _ in range(PERMUTATIONS)]
+SENTENCE = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+def shingles(text: str, size: int = SHINGLE_WORDS) -> Set[int]:
+    words = re.findall(r"\w+", text.lower())
+    grams = [" ".join(words[i:i + size]) for i in range(max(1, len(words) - size + 1))] if words else []
+    return {int.from_bytes(hashlib.blake2b(gram.encode(), digest_size=8).digest(), "big") for gram in grams}
+
+
+def minhash(features: Set[int]) -> List[int]:
+    if not features:
+        return [PRIME] * PERMUTATIONS
+    return [min((a * x + b) % PRIME for x in features) for a, b in HASH_PARAMS]
+
+
+def similarity(first: List[int], second: List[int]) -> float:
+    """Estimated Jaccard similarity of two MinHash signatures."""
+    return sum(x == y for x, y in zip(first, second)) / PERMUTATIONS
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN
+
+
+@dataclass
+class DedupResult:
+    texts: List[str]
+    dropped: int = 0
+    merged: int = 0
+    tokens_before: int = 0
+    tokens_after: int = 0
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+
+@dataclass
+class DedupStats:
+    """Running totals for one kind of text (page previews, search summaries) in this process."""
+    dropped: int = 0
+    merged: int = 0
+    tokens_saved: int = 0
+
+    def add(self, result: DedupResult) -> None:
+        self.dropped += result.dropped
+        self.merged += result.merged
+        self.tokens_saved += result.tokens_saved
+
+
+stats: Dict[str, DedupStats] = {"pages": DedupStats(), "summaries": DedupStats()}
+
+
+def duplicate_of(texts: List[str], threshold: float = DEDUP_THRESHOLD) -> List[Optional[int]]:
+    """For every text, the index of an earlier kept text it nearly duplicates (None if it is kept)."""
+    signatures = [minhash(shingles(text)) for text in texts]
+    result: List[Optional[int]] = []
+    kept: List[int] = []
+    for i, signature in enumerate(signatures):
+        match = next((k for k in kept if texts[k].strip() and similarity(signatures[k], signature) >= threshold), None)
+        result.append(match)
+        if match is None:
+            kept.append(i)
+    return result
+
+
+def novel_sentences(text: str, known: Set[int], overlap: float = 0.5) -> List[str]:
+    """Sentences of `text` whose shingles are mostly not in `known`."""
+    novel = []
+    for sentence in filter(None, (s.strip() for s in SENTENCE.split(text))):
+        features = shingles(sentence)
+        if features and len(features & known) / len(features) < overlap:
+            novel.append(sentence)
+            known |= features
+    return novel
+
+
+def dedupe(texts: List[str], kind: str, merge: bool = False, threshold: float = DEDUP_THRESHOLD) -> DedupResult:
+    """Drop (or, with `merge`, fold into the text they duplicate) near-duplicate texts.
+
+    Dropped texts keep their position as an empty string when `merge` is False, so callers can keep
+    them aligned with titles and links; merged texts are removed from the list.
+    """
+    result = DedupResult(texts=list(texts), tokens_before=sum(estimate_tokens(text) for text in texts))
+    if threshold <= 1:
+        matches = duplicate_of(texts, threshold)
+        known = {i: shingles(text) for i, text in enumerate(texts) if matches[i] is None} if merge else {}
+        for i, match in enumerate(matches):
+            if match is None:
+                continue
+            extra = novel_sentences(texts[i], known[match]) if merge else []
+            if extra:
+                result.texts[match] += "\n" + " ".join(extra)
+                result.merged += 1
+            else:
+                result.dropped += 1
+            result.texts[i] = None if merge else ""
+        result.texts = [text for text in result.texts if text is not None]
+    result.tokens_after = sum(estimate_tokens(text) for text in result.texts)
+    stats[kind].add(result)
+    return result
@@ -1,13 +1,19 @@
 import gradio as gr
 from dotenv import load_dotenv
-from research_manager import ResearchManager
+from research_manager import ResearchManager, ReportDelta
 
 load_dotenv(override=True)
 
 async def run(query: str):
     """Stream status updates and final report markdown for a given research query."""
+    report = ""
     async for chunk in ResearchManager().run(query):
-        yield chunk
+        if isinstance(chunk, ReportDelta):
+            # The markdown output shows the report as it grows
+            report += chunk.text
+            yield report
+        else:
+            yield chunk
 
 
 with gr.Blocks(theme=gr.themes.Default(primary_hue="sky")) as ui:
@@ -1,4 +1,5 @@
 import os
+from functools import lru_cache
 from typing import Dict
 
 import sendgrid
@@ -8,8 +9,13 @@ from agents import Agent, function_tool
 FROM_EMAIL = Email("your_mail_address@mail.co")
 TO_EMAIL = To("your_mail_address@mail.co")
 
-@function_tool
-def send_email(subject: str, html_body: str) -> Dict[str, str]:
+@lru_cache(maxsize=4)
+def get_sendgrid_client(api_key: str) -> sendgrid.SendGridAPIClient:
+    """One SendGrid client per API key, reused for every email."""
+    return sendgrid.SendGridAPIClient(api_key=api_key)
+
+
+def deliver_email(subject: str, html_body: str) -> Dict[str, str]:
     """
     Send an email with the given subject and HTML body using SendGrid.
 
@@ -19,7 +25,7 @@ def send_email(subject: str, html_body: str) -> Dict[str, str]:
     if not api_key:
         return {"status": "error", "message": "Missing SENDGRID_API_KEY"}
 
-    sg = sendgrid.SendGridAPIClient(api_key=api_key)
+    sg = get_sendgrid_client(api_key)
     try:
         content = Content("text/html", html_body)
         mail = Mail(FROM_EMAIL, TO_EMAIL, subject, content).get()
@@ -28,6 +34,16 @@ def send_email(subject: str, html_body: str) -> Dict[str, str]:
     except Exception as exc:
         return {"status": "error", "message": str(exc)}
 
+
+@function_tool
+def send_email(subject: str, html_body: str) -> Dict[str, str]:
+    """
+    Send an email with the given subject and HTML body using SendGrid.
+
+    Returns a dictionary indicating the result of the operation with a status key.
+    """
+    return deliver_email(subject, html_body)
+
 INSTRUCTIONS = """You are able to send a nicely formatted HTML email based on a detailed report.
 You will be provided with a detailed report. You should use your tool to send one email, providing the 
 report converted into clean, well presented HTML with an appropriate subject line."""
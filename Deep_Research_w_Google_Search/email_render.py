@@ -0,0 +1,179 @@
+import html
+import re
+import textwrap
+from typing import List, Tuple
+from writer_agent import ReportData
+
+# Fixed email template; styles are inline because most mail clients drop <style> blocks
+TEMPLATE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title></head>
+<body style="margin:0;padding:0;background:#f4f6f8;">
+<div style="max-width:720px;margin:0 auto;padding:24px;background:#ffffff;font-family:Arial,Helvetica,sans-serif;font-size:15px;line-height:1.6;color:#1f2933;">
+<p style="margin:0 0 16px;padding:12px 16px;background:#e8f4fd;border-left:4px solid #0284c7;">{summary}</p>
+{body}
+{follow_ups}
+</div></body></html>"""
+FOLLOW_UPS = """<h2 style="font-size:18px;margin:24px 0 8px;">Follow-up questions</h2>
+<ul>{items}</ul>"""
+SUBJECT_PREFIX = "Research report: "
+MAX_SUBJECT_CHARS = 78
+
+STYLES = {
+    "h1": "font-size:24px;margin:24px 0 12px;",
+    "h2": "font-size:20px;margin:24px 0 10px;",
+    "h3": "font-size:17px;margin:20px 0 8px;",
+    "pre": "background:#f1f5f9;padding:12px;overflow-x:auto;font-size:13px;",
+    "blockquote": "margin:12px 0;padding:4px 16px;border-left:4px solid #cbd5e1;color:#475569;",
+    "table": "border-collapse:collapse;margin:12px 0;",
+    "cell": "border:1px solid #cbd5e1;padding:6px 10px;text-align:left;vertical-align:top;",
+}
+
+FENCE = re.compile(r"^\s*(```|~~~)")
+HEADING = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+RULE = re.compile(r"^\s*([-*_])(\s*\1){2,}\s*$")
+LIST_ITEM = re.compile(r"^(\s*)([-*+]|\d+[.)])\s+(.*)$")
+TABLE_SEPARATOR = re.compile(r"^\s*\|?\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?\s*$")
+
+
+def render_inline(text: str) -> str:
+    code_spans: List[str] = []
+
+    def keep_code(match: re.Match) -> str:
+        code_spans.append(f"<code>{match.group(1)}</code>")
+        return f"\x00{len(code_spans) - 1}\x00"
+
+    text = re.sub(r"`([^`]+)`", keep_code, html.escape(text, quote=False))
+    text = re.sub(
+        r"\[([^\]]+)\]\(((?:https?:|mailto:)[^)\s]+)\)",
+        # The text is already escaped apart from quotes
+        lambda m: f'<a href="{m.group(2).replace(chr(34), "&quot;")}" style="color:#0369a1;">{m.group(1)}</a>',
+        text,
+    )
+    text = re.sub(r"(\*\*|__)(?=\S)(.+?)(?<=\S)\1", r"<strong>\2</strong>", text)
+    text = re.sub(r"(?<![\w*])\*(?=\S)(.+?)(?<=\S)\*(?!\*)", r"<em>\1</em>", text)
+    text = re.sub(r"(?<!\w)_(?=\S)(.+?)(?<=\S)_(?!\w)", r"<em>\1</em>", text)
+    return re.sub(r"\x00(\d+)\x00", lambda m: code_spans[int(m.group(1))], text)
+
+
+def _starts_block(lines: List[str], i: int) -> bool:
+    line = lines[i]
+    return bool(
+        FENCE.match(line) or HEADING.match(line) or RULE.match(line) or LIST_ITEM.match(line)
+        or line.lstrip().startswith(">") or _starts_table(lines, i)
+    )
+
+
+def _starts_table(lines: List[str], i: int) -> bool:
+    return "|" in lines[i] and i + 1 < len(lines) and bool(TABLE_SEPARATOR.match(lines[i + 1])) and "-" in lines[i + 1]
+
+
+def _cells(line: str) -> List[str]:
+    return [cell.strip() for cell in line.strip().strip("|").split("|")]
+
+
+def _render_list(lines: List[str], i: int) -> Tuple[str, int]:
+    indent, marker, _ = LIST_ITEM.match(lines[i]).groups()
+    tag = "ol" if marker[0].isdigit() else "ul"
+    items = []
+    while i < len(lines):
+        match = LIST_ITEM.match(lines[i])
+        if not match or len(match.group(1)) != len(indent):
+            break
+        body = [match.group(3)]
+        i += 1
+        # Continuation and nested lines are indented deeper than the marker
+        while i < len(lines) and (not lines[i].strip() or len(lines[i]) - len(lines[i].lstrip()) > len(indent)):
+            if not lines[i].strip() and (i + 1 >= len(lines) or len(lines[i + 1]) - len(lines[i + 1].lstrip()) <= len(indent)):
+                break
+            body.append(lines[i])
+            i += 1
+        nested = render_markdown(textwrap.dedent("\n".join(body[1:])))
+        first = render_inline(body[0])
+        items.append(f"<li>{first}{nested}</li>" if nested else f"<li>{first}</li>")
+    return f"<{tag}>{''.join(items)}</{tag}>", i
+
+
+def render_markdown(text: str) -> str:
+    """Render the Markdown subset the writer produces (headings, lists, tables, code, quotes) to HTML."""
+    lines = text.replace("\r\n", "\n").split("\n")
+    blocks = []
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        if not line.strip():
+            i += 1
+        elif FENCE.match(line):
+            fence = FENCE.match(line).group(1)
+            code = []
+            i += 1
+            while i < len(lines) and not lines[i].strip().startswith(fence):
+                code.append(lines[i])
+                i += 1
+            i += 1
+            blocks.append(f'<pre style="{STYLES["pre"]}"><code>{html.escape(chr(10).join(code), quote=False)}</code></pre>')
+        elif HEADING.match(line):
+            hashes, title = HEADING.match(line).groups()
+            tag = f"h{len(hashes)}"
+            style = STYLES.get(tag, STYLES["h3"])
+            blocks.append(f'<{tag} style="{style}">{render_inline(title)}</{tag}>')
+            i += 1
+        elif RULE.match(line):
+            blocks.append('<hr style="border:none;border-top:1px solid #e2e8f0;margin:20px 0;">')
+            i += 1
+        elif line.lstrip().startswith(">"):
+            quoted = []
+            while i < len(lines) and lines[i].lstrip().startswith(">"):
+                quoted.append(re.sub(r"^\s*> ?", "", lines[i]))
+                i += 1
+            blocks.append(f'<blockquote style="{STYLES["blockquote"]}">{render_markdown(chr(10).join(quoted))}</blockquote>')
+        elif LIST_ITEM.match(line):
+            block, i = _render_list(lines, i)
+            blocks.append(block)
+        elif _starts_table(lines, i):
+            header = "".join(f'<th style="{STYLES["cell"]}">{render_inline(cell)}</th>' for cell in _cells(line))
+            rows = []
+            i += 2
+            while i < len(lines) and "|" in lines[i] and lines[i].strip():
+                rows.append("<tr>" + "".join(f'<td style="{STYLES["cell"]}">{render_inline(cell)}</td>' for cell in _cells(lines[i])) + "</tr>")
+                i += 1
+            blocks.append(f'<table style="{STYLES["table"]}"><thead><tr>{header}</tr></thead><tbody>{"".join(rows)}</tbody></table>')
+        else:
+            paragraph = [line.strip()]
+            i += 1
+            while i < len(lines) and lines[i].strip() and not _starts_block(lines, i):
+                paragraph.append(lines[i].strip())
+                i += 1
+            blocks.append(f"<p>{render_inline(' '.join(paragraph))}</p>")
+    return "\n".join(blocks)
+
+
+def report_title(report: ReportData) -> str:
+    """The report's first heading, or failing that the first sentence of its summary."""
+    for line in report.markdown_report.splitlines():
+        match = HEADING.match(line)
+        if match:
+            return re.sub(r"[*_`]", "", match.group(2)).strip()
+    return re.split(r"(?<=[.!?])\s", report.short_summary.strip(), maxsplit=1)[0].rstrip(".")
+
+
+def subject_for(report: ReportData) -> str:
+    subject = SUBJECT_PREFIX + " ".join(report_title(report).split())
+    if len(subject) > MAX_SUBJECT_CHARS:
+        subject = subject[:MAX_SUBJECT_CHARS - 1].rsplit(" ", 1)[0] + "…"
+    return subject
+
+
+def render_email(report: ReportData) -> Tuple[str, str]:
+    """Subject and HTML body of the report email, without a model call."""
+    subject = subject_for(report)
+    follow_ups = ""
+    if report.follow_up_questions:
+        items = "".join(f"<li>{render_inline(question)}</li>" for question in report.follow_up_questions)
+        follow_ups = FOLLOW_UPS.format(items=items)
+    body = TEMPLATE.format(
+        title=html.escape(subject),
+        summary=render_inline(report.short_summary),
+        body=render_markdown(report.markdown_report),
+        follow_ups=follow_ups,
+    )
+    return subject, body
@@ -1,16 +1,33 @@
+import asyncio
 import os
+import weakref
+from functools import lru_cache
 from dotenv import load_dotenv
-from bs4 import BeautifulSoup
+import httpx
 import requests
 from agents import function_tool
+from dedup import dedupe
 from googleapiclient.discovery import build
+from googleapiclient.http import build_http
+from page_text import TextExtractor, charset, extract_text, is_html
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from search_cache import cache, page_key, query_key
+from typing import AsyncIterator, Optional, List
 
 load_dotenv(override=True)
 API_KEY: Optional[str] = os.environ.get('GOOGLE_SEARCH_API_KEY')
 SEARCH_CONTEXT: Optional[str] = os.environ.get('GOOGLE_SEARCH_CONTEXT')
 
+# Result pages are fetched concurrently through one pooled client per event loop;
+# FETCH_MAX_CONNECTIONS bounds the pages in flight across all concurrent searches
+FETCH_MAX_CONNECTIONS = int(os.environ.get('FETCH_MAX_CONNECTIONS', '10'))
+FETCH_TIMEOUT_SECONDS = float(os.environ.get('FETCH_TIMEOUT_SECONDS', '10'))
+MAX_CONTENT_CHARS = 2000
+# Pages are read in chunks and parsing stops once MAX_CONTENT_CHARS of text are collected;
+# MAX_PAGE_BYTES caps the download of pages that never get there (script-heavy shells)
+CHUNK_BYTES = 16384
+MAX_PAGE_BYTES = 2_000_000
+
 
 class SearchResult(BaseModel):
     title: str = Field(description="The title of the search result.")
@@ -22,6 +39,16 @@ class SearchResults(BaseModel):
     results: List[SearchResult] = Field(description="A list of search results.")
 
 
+def page_chunks(chunks):
+    """Response body chunks up to MAX_PAGE_BYTES."""
+    read = 0
+    for chunk in chunks:
+        yield chunk
+        read += len(chunk)
+        if read >= MAX_PAGE_BYTES:
+            return
+
+
 def fetch_page_content(url: str) -> str:
     """
     Fetch a web page and return a small text-only preview of its content.
@@ -29,17 +56,95 @@ def fetch_page_content(url: str) -> str:
     Returns the first ~2000 characters of extracted text, or an error description.
     """
     try:
-        page = requests.get(url, timeout=10)
+        with requests.get(url, timeout=FETCH_TIMEOUT_SECONDS, stream=True) as page:
+            page.raise_for_status()
+            content_type = page.headers.get('content-type')
+            if not is_html(content_type):
+                return f"Skipped {url}: not an HTML page ({content_type})"
+            return extract_text(page_chunks(page.iter_content(CHUNK_BYTES)), MAX_CONTENT_CHARS, charset(content_type))
+    except Exception as exc:
+        return f"Error fetching {url}: {str(exc)}"
+
+
+_http_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, tuple[httpx.AsyncClient, AsyncIterator[None]]]" = weakref.WeakKeyDictionary()
+
+
+async def _client_lifetime(loop: asyncio.AbstractEventLoop, client: httpx.AsyncClient) -> AsyncIterator[None]:
+    # Suspended until the loop shuts down: asyncio.run() finalizes pending async generators
+    # (loop.shutdown_asyncgens) before closing the loop, so the client's connections are closed
+    # on the loop that opened them
+    try:
+        yield
+    finally:
+        _http_clients.pop(loop, None)
+        await client.aclose()
+
+
+async def get_http_client() -> httpx.AsyncClient:
+    """Return the pooled client of the running event loop (connection pools cannot be shared across loops).
+
+    The client is closed when its loop shuts down.
+    """
+    loop = asyncio.get_running_loop()
+    entry = _http_clients.get(loop)
+    if entry is None:
+        client = httpx.AsyncClient(
+            follow_redirects=True,
+            # Waiting for a free connection does not count against the page timeout
+            timeout=httpx.Timeout(FETCH_TIMEOUT_SECONDS, pool=None),
+            limits=httpx.Limits(max_connections=FETCH_MAX_CONNECTIONS, max_keepalive_connections=FETCH_MAX_CONNECTIONS),
+        )
+        lifetime = _client_lifetime(loop, client)
+        await anext(lifetime)
+        _http_clients[loop] = (client, lifetime)
+        return client
+    return entry[0]
+
+
+async def read_page_text(url: str) -> str:
+    """Preview text of a page, read through the pooled client (raises on HTTP errors)."""
+    client = await get_http_client()
+    async with client.stream('GET', url) as page:
         page.raise_for_status()
-        soup = BeautifulSoup(page.content, 'html.parser')
-        text = soup.get_text()
-        return text[:2000]
+        content_type = page.headers.get('content-type')
+        if not is_html(content_type):
+            return f"Skipped {url}: not an HTML page ({content_type})"
+        extractor = TextExtractor(MAX_CONTENT_CHARS, charset(content_type))
+        read = 0
+        async for chunk in page.aiter_bytes(CHUNK_BYTES):
+            read += len(chunk)
+            # Leaving the block closes the connection without downloading the rest of the page
+            if extractor.feed_bytes(chunk) or read >= MAX_PAGE_BYTES:
+                break
+        return extractor.text()
+
+
+async def fetch_page_content_async(url: str) -> str:
+    """Async variant of fetch_page_content using the pooled client and the search cache."""
+    try:
+        return await cache.get_or_fetch('page', page_key(url), lambda: read_page_text(url))
     except Exception as exc:
         return f"Error fetching {url}: {str(exc)}"
 
 
+@lru_cache(maxsize=1)
+def get_search_service():
+    """The customsearch discovery service, built once per process."""
+    return build("customsearch", "v1", developerKey=API_KEY, cache_discovery=False)
+
+
+def search_items(query: str) -> List[dict]:
+    request = get_search_service().cse().list(q=f'{query}', cx=f'{SEARCH_CONTEXT}')
+    # The shared service's httplib2 connection is not thread-safe, so every call gets its own
+    return request.execute(http=build_http()).get('items', [])
+
+
+async def search_items_cached(query: str) -> List[dict]:
+    return await cache.get_or_fetch('query', query_key(query, SEARCH_CONTEXT), lambda: asyncio.to_thread(search_items, query))
+
+
 @function_tool
-def run_google_search(query: str) -> List[dict[str, str]]:
+async def run_google_search(query: str) -> List[dict[str, str]]:
     """
     Run a Google Custom Search for the provided query and return a list of result dicts
     including title, link, and a short content preview fetched from each page.
@@ -47,26 +152,19 @@ def run_google_search(query: str) -> List[dict[str, str]]:
     if not API_KEY or not SEARCH_CONTEXT:
         return []
 
-    search_results = SearchResults(results=[])
-    service = build("customsearch", "v1", developerKey=API_KEY)
-    res = (
-        service.cse()
-        .list(
-            q=f'{query}',
-            cx=f'{SEARCH_CONTEXT}',
-        )
-        .execute()
-    )
-
-    for item in res.get('items', []):
-        content = fetch_page_content(item.get('link', ''))
-        search_results.results.append(
-            SearchResult(
-                title=item.get('title', ''),
-                link=item.get('link', ''),
-                content=content,
-            )
+    items = await search_items_cached(query)
+    contents = await asyncio.gather(*(fetch_page_content_async(item.get('link', '')) for item in items))
+    # Mirrored and syndicated pages: keep one preview (shingling is CPU-bound, so off the loop)
+    contents = (await asyncio.to_thread(dedupe, list(contents), 'pages')).texts
+
+    search_results = SearchResults(results=[
+        SearchResult(
+            title=item.get('title', ''),
+            link=item.get('link', ''),
+            content=content,
         )
+        for item, content in zip(items, contents)
+    ])
 
     # Convert to primitive dicts for tool friendliness
     return [result.model_dump() for result in search_results.results]
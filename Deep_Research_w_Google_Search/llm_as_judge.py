@@ -1,14 +1,24 @@
 from __future__ import annotations
 
+import argparse
 import asyncio
-from dataclasses import dataclass
+import re
+import time
+from dataclasses import dataclass, field
 from pydantic import BaseModel, Field
-from agents import Agent, ItemHelpers, Runner, TResponseInputItem, trace
+from agents import Agent, ItemHelpers, ModelSettings, Runner, RunConfig, RunResult, TResponseInputItem, trace
+from model_replay import RecordReplayProvider
+from admission import admitted
 
 """
 This example shows the LLM as a judge pattern. The first agent generates an outline for a story.
 The second agent judges the outline and provides feedback. We loop until the judge is satisfied
 with the outline.
+
+With --mode best-of-n, every round generates -n candidate outlines (default 3) concurrently and
+scores them in parallel. Only the best candidate and its condensed feedback are carried into the next
+round, instead of the whole growing transcript. --mode compare runs both loops and reports
+wall-clock and token use. The default, --mode sequential, is the original loop.
 """
 
 story_outline_generator = Agent(
@@ -42,43 +52,153 @@ evaluator = Agent[None](
     model="gpt-4o-mini",
 )
 
-
-async def main() -> None:
-    msg = input("What kind of story would you like to hear? ")
+# Set MODEL_MODE=record or MODEL_MODE=replay to capture or reuse the model responses offline
+RUN_CONFIG = RunConfig(model_provider=admitted(RecordReplayProvider()))
+
+
+PASS_SCORE = 7
+MAX_ITERATIONS = 5
+FEEDBACK_CHARS = 400
+
+
+@dataclass
+class JudgeRun:
+    outline: str | None = None
+    score: int = 0
+    rounds: int = 0
+    model_calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    seconds: float = 0.0
+    scores: list[int] = field(default_factory=list)
+
+    def count(self, result: RunResult) -> None:
+        usage = result.context_wrapper.usage
+        self.model_calls += usage.requests
+        self.input_tokens += usage.input_tokens
+        self.output_tokens += usage.output_tokens
+
+    def describe(self) -> str:
+        return (
+            f"{self.rounds} rounds, {self.model_calls} model calls, {self.seconds:.1f}s, "
+            f"{self.input_tokens} input + {self.output_tokens} output tokens, final score {self.score}"
+        )
+
+
+def condense(feedback: str, max_chars: int = FEEDBACK_CHARS) -> str:
+    """The leading sentences of the feedback that fit in max_chars."""
+    kept = ""
+    for sentence in re.split(r"(?<=[.!?])\s+", feedback.strip()):
+        if kept and len(kept) + len(sentence) + 1 > max_chars:
+            break
+        kept = f"{kept} {sentence}".strip()
+    return kept[:max_chars]
+
+
+async def sequential(msg: str) -> JudgeRun:
+    """Generate, evaluate, and re-generate with the full transcript until the judge is satisfied."""
+    run = JudgeRun()
+    start = time.perf_counter()
     input_items: list[TResponseInputItem] = [{"content": msg, "role": "user"}]
 
-    latest_outline: str | None = None
-    num_iterations: int = 0
+    while run.rounds < MAX_ITERATIONS:
+        run.rounds += 1
+        print(f"Iteration {run.rounds}")
+        story_outline_result = await Runner.run(
+            story_outline_generator,
+            input_items,
+            run_config=RUN_CONFIG,
+        )
+        run.count(story_outline_result)
+
+        input_items = story_outline_result.to_input_list()
+        run.outline = ItemHelpers.text_message_outputs(story_outline_result.new_items)
+        print("Story outline generated")
+
+        evaluator_result = await Runner.run(evaluator, input_items, run_config=RUN_CONFIG)
+        run.count(evaluator_result)
+        result: EvaluationFeedback = evaluator_result.final_output
+        run.score = result.score
+        run.scores.append(result.score)
+
+        print(f"Evaluator score: {result.score}")
+
+        if result.score >= PASS_SCORE:
+            print("Story outline is good enough, exiting.")
+            break
+
+        print("Re-running with feedback")
+
+        input_items.append({"content": f"Feedback: {result.feedback}", "role": "user"})
+
+    run.seconds = time.perf_counter() - start
+    return run
+
+
+async def best_of_n(msg: str, n: int, max_rounds: int = MAX_ITERATIONS) -> JudgeRun:
+    """Per round, generate n outlines and judge them concurrently; carry forward only the best one."""
+    run = JudgeRun()
+    start = time.perf_counter()
+    # Slightly different temperatures keep the candidates of a round apart
+    generators = [
+        story_outline_generator.clone(model_settings=ModelSettings(temperature=min(1.2, 0.7 + 0.15 * i)))
+        for i in range(n)
+    ]
+    best: str | None = None
+    feedback: str | None = None
+
+    async def candidate(generator: Agent, prompt: str) -> tuple[str, EvaluationFeedback]:
+        generated = await Runner.run(generator, prompt, run_config=RUN_CONFIG)
+        run.count(generated)
+        outline = ItemHelpers.text_message_outputs(generated.new_items)
+        judged = await Runner.run(evaluator, f"Story request: {msg}\n\nOutline:\n{outline}", run_config=RUN_CONFIG)
+        run.count(judged)
+        return outline, judged.final_output
+
+    while run.rounds < max_rounds:
+        run.rounds += 1
+        prompt = msg if best is None else f"{msg}\n\nBest outline so far:\n{best}\n\nFeedback: {feedback}"
+        results = await asyncio.gather(*(candidate(generator, prompt) for generator in generators))
+        outline, result = max(results, key=lambda r: r[1].score)
+        print(f"Round {run.rounds}: scores {[r[1].score for r in results]}")
+        if result.score >= run.score or best is None:
+            best, feedback, run.score = outline, condense(result.feedback), result.score
+        run.scores.append(result.score)
+        if run.score >= PASS_SCORE:
+            print("Story outline is good enough, exiting.")
+            break
+
+    run.outline = best
+    run.seconds = time.perf_counter() - start
+    return run
+
+
+async def main(mode: str = "sequential", n: int = 3) -> None:
+    msg = input("What kind of story would you like to hear? ")
 
     # We'll run the entire workflow in a single trace
     with trace("LLM as a judge"):
-        while True and num_iterations < 5:
-            num_iterations += 1
-            print(f"Iteration {num_iterations}")
-            story_outline_result = await Runner.run(
-                story_outline_generator,
-                input_items,
-            )
-
-            input_items = story_outline_result.to_input_list()
-            latest_outline = ItemHelpers.text_message_outputs(story_outline_result.new_items)
-            print("Story outline generated")
-
-            evaluator_result = await Runner.run(evaluator, input_items)
-            result: EvaluationFeedback = evaluator_result.final_output
-
-            print(f"Evaluator score: {result.score}")
-
-            if result.score >= 7:
-                print("Story outline is good enough, exiting.")
-                break
-
-            print("Re-running with feedback")
-
-            input_items.append({"content": f"Feedback: {result.feedback}", "role": "user"})
-
-    print(f"Final story outline: {latest_outline}")
+        runs = {}
+        if mode in ("sequential", "compare"):
+            runs["sequential"] = await sequential(msg)
+        if mode in ("best-of-n", "compare"):
+            runs[f"best-of-{n}"] = await best_of_n(msg, n)
+
+    for name, run in runs.items():
+        print(f"{name}: {run.describe()}")
+    if len(runs) == 2:
+        baseline, parallel = runs.values()
+        print(
+            f"best-of-{n} vs sequential: {baseline.seconds - parallel.seconds:+.1f}s wall-clock saved, "
+            f"{baseline.input_tokens - parallel.input_tokens:+d} input tokens saved"
+        )
+    for name, run in runs.items():
+        print(f"Final story outline ({name}): {run.outline}")
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="LLM as a judge: sequential refinement or parallel best-of-N")
+    parser.add_argument("--mode", choices=["sequential", "best-of-n", "compare"], default="sequential")
+    parser.add_argument("-n", type=int, default=3, help="candidates per round in best-of-n mode")
+    cli = parser.parse_args()
+    asyncio.run(main(cli.mode, cli.n))
@@ -0,0 +1 @@
+../Trader_Agents/model_replay.py
\ No newline at end of file
@@ -0,0 +1,112 @@
+import codecs
+import re
+from html.parser import HTMLParser
+from typing import Iterable, Optional
+
+# Elements whose content is never readable page text
+SKIPPED_TAGS = {"script", "style", "noscript", "template", "svg", "math", "iframe", "object", "canvas"}
+# Elements that separate words when the markup has no whitespace between them ("<p>a</p><p>b</p>")
+BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "br", "dd", "div", "dl", "dt", "figcaption", "figure",
+    "footer", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr", "li", "main", "nav", "ol", "p", "pre",
+    "section", "table", "td", "th", "title", "tr", "ul",
+}
+HTML_CONTENT_TYPES = {"text/html", "application/xhtml+xml"}
+WHITESPACE = re.compile(r"\s+")
+CHARSET = re.compile(r"charset=[\"']?([\w.:-]+)", re.IGNORECASE)
+
+
+def is_html(content_type: Optional[str]) -> bool:
+    """Whether a Content-Type header announces HTML (a missing header is given the benefit of the doubt)."""
+    if not content_type:
+        return True
+    return content_type.split(";")[0].strip().lower() in HTML_CONTENT_TYPES
+
+
+def charset(content_type: Optional[str], default: str = "utf-8") -> str:
+    match = CHARSET.search(content_type or "")
+    if match:
+        try:
+            return codecs.lookup(match.group(1)).name
+        except LookupError:
+            pass
+    return default
+
+
+class TextExtractor(HTMLParser):
+    """Incremental HTML-to-text extractor that stops collecting once `budget` characters are reached.
+
+    Feed it response chunks as they arrive (`feed_bytes`); `done` turns true as soon as the budget
+    is met, so the caller can stop reading the response. Content of script/style-like elements is skipped and runs
+    of whitespace are collapsed to a single space.
+    """
+
+    def __init__(self, budget: int, encoding: str = "utf-8"):
+        super().__init__(convert_charrefs=True)
+        self.budget = budget
+        self.decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        self.parts: list[str] = []
+        self.length = 0
+        self.skip_depth = 0
+        self.pending_space = False
+        self.done = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIPPED_TAGS:
+            self.skip_depth += 1
+        elif tag in BLOCK_TAGS:
+            self.pending_space = True
+
+    def handle_endtag(self, tag):
+        if tag in SKIPPED_TAGS:
+            self.skip_depth = max(0, self.skip_depth - 1)
+        elif tag in BLOCK_TAGS:
+            self.pending_space = True
+
+    def handle_startendtag(self, tag, attrs):
+        # Self-closing <svg/> or <br/> has no content to skip
+        if tag in BLOCK_TAGS:
+            self.pending_space = True
+
+    def handle_data(self, data):
+        if self.done or self.skip_depth:
+            return
+        text = WHITESPACE.sub(" ", data)
+        if text.startswith(" "):
+            self.pending_space = True
+            text = text.lstrip(" ")
+        if not text:
+            return
+        if self.pending_space and self.length:
+            self.parts.append(" ")
+            self.length += 1
+        self.pending_space = text.endswith(" ")
+        text = text.rstrip(" ")
+        self.parts.append(text)
+        self.length += len(text)
+        if self.length >= self.budget:
+            self.done = True
+
+    def feed(self, data: str) -> None:
+        if not self.done:
+            super().feed(data)
+
+    def feed_bytes(self, chunk: bytes) -> bool:
+        """Decode and parse the next chunk of the response body; returns `done`."""
+        self.feed(self.decoder.decode(chunk))
+        return self.done
+
+    def text(self) -> str:
+        if not self.done:
+            self.feed(self.decoder.decode(b"", final=True))
+            self.close()
+        return "".join(self.parts)[:self.budget]
+
+
+def extract_text(chunks: Iterable[bytes], budget: int, encoding: str = "utf-8") -> str:
+    """Text of an HTML document given as byte chunks, reading only as many chunks as the budget needs."""
+    extractor = TextExtractor(budget, encoding)
+    for chunk in chunks:
+        if extractor.feed_bytes(chunk):
+            break
+    return extractor.text()
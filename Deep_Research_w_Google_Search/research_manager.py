@@ -1,84 +1,332 @@
-from agents import Runner, trace, gen_trace_id
+from agents import Runner, RunConfig, trace, gen_trace_id
 from search_agent import search_agent
 from planner_agent import planner_agent, WebSearchItem, WebSearchPlan
-from writer_agent import writer_agent, ReportData
-from email_agent import email_agent
+from writer_agent import writer_agent, ReportData, StreamedField
+from email_agent import email_agent, deliver_email
+from email_render import render_email
+from model_replay import RecordReplayProvider
+from admission import admitted, lane
+from artifact_store import ArtifactStore, artifact_key, query_run_id, store as artifact_store
+from dedup import dedupe, stats as dedup_stats
+from contextlib import nullcontext
+from dataclasses import dataclass
+from dotenv import load_dotenv
+from openai.types.responses import ResponseTextDeltaEvent
+from typing import AsyncIterator
 import asyncio
+import math
+import os
+import time
+
+load_dotenv(override=True)
+
+# Search fan-out: at most SEARCH_CONCURRENCY searches run at once, each is abandoned after
+# SEARCH_TIMEOUT_SECONDS, and whatever has not finished SEARCH_DEADLINE_SECONDS after the first
+# search started is cancelled. With WRITE_PARTIAL_RESULTS the report is written from the searches
+# that completed in time; otherwise hitting the deadline aborts the run.
+SEARCH_CONCURRENCY = int(os.getenv("SEARCH_CONCURRENCY", "3"))
+SEARCH_TIMEOUT_SECONDS = float(os.getenv("SEARCH_TIMEOUT_SECONDS", "60"))
+SEARCH_DEADLINE_SECONDS = float(os.getenv("SEARCH_DEADLINE_SECONDS", "180"))
+WRITE_PARTIAL_RESULTS = os.getenv("WRITE_PARTIAL_RESULTS", "true").lower() == "true"
+
+# Pipelining: once SEARCH_QUORUM (a fraction of the planned searches) has succeeded, the remaining
+# searches get QUORUM_GRACE_SECONDS more and writing starts from whatever finished. With
+# STREAM_REPORT the report is yielded token by token (as ReportDelta) while it is being written.
+SEARCH_QUORUM = float(os.getenv("SEARCH_QUORUM", "1.0"))
+QUORUM_GRACE_SECONDS = float(os.getenv("QUORUM_GRACE_SECONDS", "5"))
+STREAM_REPORT = os.getenv("STREAM_REPORT", "true").lower() == "true"
+
+# EMAIL_MODE: "template" renders the report to HTML locally with a fixed template; "llm" has the
+# email agent write the HTML and subject (one more model round trip)
+EMAIL_MODE = os.getenv("EMAIL_MODE", "template")
+
+# Agents here are declared with model name strings; the provider records or replays their
+# responses when MODEL_MODE is "record" or "replay" and calls OpenAI directly otherwise.
+# Live calls go through the shared admission controller (per-provider rate limits).
+RUN_CONFIG = RunConfig(model_provider=admitted(RecordReplayProvider()))
+
+@dataclass
+class SearchOutcome:
+    index: int  # position of the search in the plan
+    query: str
+    status: str  # "ok" | "failed" | "timeout" | "cancelled"
+    seconds: float
+    summary: str | None = None
+    error: str | None = None
+
+    def describe(self) -> str:
+        detail = f": {self.error}" if self.error else ""
+        return f"Search '{self.query}' {self.status} after {self.seconds:.1f}s{detail}"
+
+
+@dataclass
+class ReportDelta:
+    """Newly generated text of the markdown report (streaming mode)."""
+    text: str
+
 
 class ResearchManager:
 
+    def __init__(
+        self,
+        concurrency: int = SEARCH_CONCURRENCY,
+        search_timeout: float = SEARCH_TIMEOUT_SECONDS,
+        deadline: float = SEARCH_DEADLINE_SECONDS,
+        write_partial: bool = WRITE_PARTIAL_RESULTS,
+        quorum: float = SEARCH_QUORUM,
+        quorum_grace: float = QUORUM_GRACE_SECONDS,
+        stream: bool = STREAM_REPORT,
+        email: bool = True,
+        email_mode: str = EMAIL_MODE,
+        search_slots: asyncio.Semaphore | None = None,
+        run_config: RunConfig = RUN_CONFIG,
+        artifacts: ArtifactStore = artifact_store,
+        run_id: str | None = None,
+    ):
+        self.concurrency = concurrency
+        self.search_timeout = search_timeout
+        self.deadline = deadline
+        self.write_partial = write_partial
+        self.quorum = quorum
+        self.quorum_grace = quorum_grace
+        self.stream = stream
+        self.email = email
+        self.email_mode = email_mode
+        # Shared by every manager of a batch, to bound searches across all of its queries
+        self.search_slots = search_slots
+        self.run_config = run_config
+        self.artifacts = artifacts
+        # Checkpoints are only reused by a run with the same id. Without one, each run uses the id of its
+        # normalized query, so asking the same question again within ARTIFACT_TTL_SECONDS resumes it
+        self.resume_id = run_id
+        self.run_id = run_id
+        self.report: ReportData | None = None
+
     async def run(self, query: str):
-        """ Run the deep research process, yielding the status updates and the final report"""
+        """ Run the deep research process, yielding the status updates and the final report
+
+        In streaming mode the report is also yielded piece by piece, as ReportDelta, while it is written.
+        """
         trace_id = gen_trace_id()
         with trace("Research trace", trace_id=trace_id):
             print(f"View trace: https://platform.openai.com/traces/trace?trace_id={trace_id}")
             yield f"View trace: https://platform.openai.com/traces/trace?trace_id={trace_id}"
+            self.run_id = self.resume_id or query_run_id(query)
+            if self.artifacts.enabled:
+                print(f"Checkpointing as run {self.run_id}")
             print("Starting research...")
             search_plan = await self.plan_searches(query)
-            yield "Searches planned, starting to search..."     
-            search_results = await self.perform_searches(search_plan)
+            yield "Searches planned, starting to search..."
+            total = len(search_plan.searches)
+            summaries: list[str | None] = [None] * total
+            succeeded = 0
+            pages_saved = dedup_stats["pages"].tokens_saved
+            async for outcome in self.search_outcomes(search_plan):
+                if outcome.summary is not None:
+                    summaries[outcome.index] = outcome.summary
+                    succeeded += 1
+                yield f"{outcome.describe()} ({succeeded}/{total} succeeded)"
+            # Plan order rather than completion order, so the same summaries make the same report input
+            search_results = [summary for summary in summaries if summary is not None]
+            if len(search_results) < total and not self.write_partial:
+                raise RuntimeError(f"Only {len(search_results)} of {total} searches completed; not writing a partial report")
+            summaries = await asyncio.to_thread(dedupe, search_results, "summaries", merge=True)
+            search_results = summaries.texts
+            # Page previews are deduplicated inside each search; concurrent runs in this process count too
+            pages_saved = dedup_stats["pages"].tokens_saved - pages_saved
+            if summaries.tokens_saved or pages_saved:
+                yield (
+                    f"Near-duplicates removed: {summaries.dropped} summaries dropped, {summaries.merged} merged "
+                    f"(~{summaries.tokens_saved} tokens), ~{pages_saved} tokens of page previews"
+                )
             yield "Searches complete, writing report..."
-            report = await self.write_report(query, search_results)
-            yield "Report written, sending email..."
-            await self.send_email(report)
-            yield "Email sent, research complete"
+            if self.stream:
+                report = None
+                async for event in self.write_report_streamed(query, search_results):
+                    if isinstance(event, ReportData):
+                        report = event
+                    else:
+                        yield event
+            else:
+                report = await self.write_report(query, search_results)
+            self.report = report
+            if self.email:
+                yield "Report written, sending email..."
+                await self.send_email(report)
+                yield "Email sent, research complete"
+            else:
+                yield "Report written, research complete"
             yield report.markdown_report
         
 
+    async def checkpoint(self, stage: str, key: str) -> str | None:
+        """ The stored output of a stage whose inputs hashed to `key`, if an earlier attempt of this run finished it """
+        output = await asyncio.to_thread(self.artifacts.get, key)
+        if output is not None:
+            print(f"Reusing checkpointed {stage}")
+        return output
+
+    async def save_checkpoint(self, stage: str, key: str, input: str, output: str) -> None:
+        await asyncio.to_thread(self.artifacts.put, key, self.run_id, stage, input, output)
+
     async def plan_searches(self, query: str) -> WebSearchPlan:
         """ Plan the searches to perform for the query """
+        input = f"Query: {query}"
+        key = artifact_key("plan", planner_agent, input, self.run_id)
+        saved = await self.checkpoint("plan", key)
+        if saved is not None:
+            return WebSearchPlan.model_validate_json(saved)
         print("Planning searches...")
         result = await Runner.run(
             planner_agent,
-            f"Query: {query}",
+            input,
+            run_config=self.run_config,
         )
         print(f"Will perform {len(result.final_output.searches)} searches")
-        return result.final_output_as(WebSearchPlan)
+        plan = result.final_output_as(WebSearchPlan)
+        await self.save_checkpoint("plan", key, input, plan.model_dump_json())
+        return plan
 
     async def perform_searches(self, search_plan: WebSearchPlan) -> list[str]:
         """ Perform the searches to perform for the query """
-        print("Searching...")
-        num_completed = 0
-        tasks = [asyncio.create_task(self.search(item)) for item in search_plan.searches]
         results = []
-        for task in asyncio.as_completed(tasks):
-            result = await task
-            if result is not None:
-                results.append(result)
-            num_completed += 1
-            print(f"Searching... {num_completed}/{len(tasks)} completed")
-        print("Finished searching")
+        async for outcome in self.search_outcomes(search_plan):
+            if outcome.summary is not None:
+                results.append(outcome.summary)
         return results
 
-    async def search(self, item: WebSearchItem) -> str | None:
+    async def search_outcomes(self, search_plan: WebSearchPlan) -> AsyncIterator[SearchOutcome]:
+        """ Run the searches with bounded concurrency, yielding each outcome as it finishes """
+        print("Searching...")
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def bounded(index: int, item: WebSearchItem) -> SearchOutcome:
+            async with semaphore, self.search_slots or nullcontext():
+                start = time.perf_counter()
+                try:
+                    summary = await asyncio.wait_for(self.search(item), self.search_timeout)
+                    return SearchOutcome(index, item.query, "ok", time.perf_counter() - start, summary)
+                except asyncio.TimeoutError:
+                    return SearchOutcome(index, item.query, "timeout", time.perf_counter() - start)
+                except Exception as e:
+                    return SearchOutcome(index, item.query, "failed", time.perf_counter() - start, error=str(e))
+
+        tasks = {asyncio.create_task(bounded(i, item)): (i, item) for i, item in enumerate(search_plan.searches)}
+        pending = set(tasks)
+        started = time.perf_counter()
+        deadline = started + self.deadline
+        reason = "overall search deadline reached"
+        quorum = max(1, math.ceil(self.quorum * len(tasks)))
+        succeeded = 0
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, timeout=max(0.0, deadline - time.perf_counter()), return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    break
+                for task in done:
+                    outcome = task.result()
+                    print(outcome.describe())
+                    yield outcome
+                    succeeded += outcome.status == "ok"
+                if pending and succeeded >= quorum and time.perf_counter() + self.quorum_grace < deadline:
+                    # Enough to write from; stragglers get a short grace period
+                    deadline = time.perf_counter() + self.quorum_grace
+                    reason = f"quorum of {quorum} searches reached"
+            for task in pending:
+                task.cancel()
+                index, item = tasks[task]
+                outcome = SearchOutcome(index, item.query, "cancelled", time.perf_counter() - started, error=reason)
+                print(outcome.describe())
+                yield outcome
+        finally:
+            # Also reached when the consumer stops iterating early
+            for task in pending:
+                task.cancel()
+        print("Finished searching")
+
+    async def search(self, item: WebSearchItem) -> str:
         """ Perform a search for the query """
         input = f"Search term: {item.query}\nReason for searching: {item.reason}"
-        try:
-            result = await Runner.run(
-                search_agent,
-                input,
-            )
-            return str(result.final_output)
-        except Exception:
-            return None
+        key = artifact_key("search", search_agent, input, self.run_id)
+        saved = await self.checkpoint(f"search '{item.query}'", key)
+        if saved is not None:
+            return saved
+        result = await Runner.run(
+            search_agent,
+            input,
+            run_config=self.run_config,
+        )
+        summary = str(result.final_output)
+        await self.save_checkpoint("search", key, input, summary)
+        return summary
 
     async def write_report(self, query: str, search_results: list[str]) -> ReportData:
         """ Write the report for the query """
-        print("Thinking about report...")
         input = f"Original query: {query}\nSummarized search results: {search_results}"
-        result = await Runner.run(
-            writer_agent,
-            input,
-        )
+        key = artifact_key("report", writer_agent, input, self.run_id)
+        saved = await self.checkpoint("report", key)
+        if saved is not None:
+            return ReportData.model_validate_json(saved)
+        print("Thinking about report...")
+        with lane("report"):
+            result = await Runner.run(
+                writer_agent,
+                input,
+                run_config=self.run_config,
+            )
 
         print("Finished writing report")
-        return result.final_output_as(ReportData)
+        report = result.final_output_as(ReportData)
+        await self.save_checkpoint("report", key, input, report.model_dump_json())
+        return report
+
+    async def write_report_streamed(self, query: str, search_results: list[str]) -> AsyncIterator[ReportDelta | ReportData]:
+        """ Write the report, yielding the markdown as it is generated and the ReportData last """
+        input = f"Original query: {query}\nSummarized search results: {search_results}"
+        key = artifact_key("report", writer_agent, input, self.run_id)
+        saved = await self.checkpoint("report", key)
+        if saved is not None:
+            report = ReportData.model_validate_json(saved)
+            yield ReportDelta(report.markdown_report)
+            yield report
+            return
+        print("Thinking about report...")
+        start = time.perf_counter()
+        first_output = None
+        markdown = StreamedField("markdown_report")
+        with lane("report"):
+            result = Runner.run_streamed(
+                writer_agent,
+                input,
+                run_config=self.run_config,
+            )
+        async for event in result.stream_events():
+            if event.type == "raw_response_event" and isinstance(event.data, ResponseTextDeltaEvent):
+                text = markdown.feed(event.data.delta)
+                if text:
+                    if first_output is None:
+                        first_output = time.perf_counter() - start
+                        print(f"First report output after {first_output:.1f}s")
+                    yield ReportDelta(text)
+        print(f"Finished writing report in {time.perf_counter() - start:.1f}s")
+        report = result.final_output_as(ReportData)
+        await self.save_checkpoint("report", key, input, report.model_dump_json())
+        yield report
     
     async def send_email(self, report: ReportData) -> None:
-        """Use the email agent to send the report via email."""
+        """Send the report via email, rendered locally or (EMAIL_MODE=llm) by the email agent."""
+        if self.email_mode != "llm":
+            subject, html_body = render_email(report)
+            result = await asyncio.to_thread(deliver_email, subject, html_body)
+            print(f"Email '{subject}': {result['status']}")
+            return
         print("Writing email...")
-        await Runner.run(
-            email_agent,
-            report.markdown_report,
-        )
+        with lane("report"):
+            await Runner.run(
+                email_agent,
+                report.markdown_report,
+                run_config=self.run_config,
+            )
         print("Email sent")
\ No newline at end of file
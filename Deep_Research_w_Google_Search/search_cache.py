@@ -0,0 +1,208 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+# Custom Search results (by normalized query) and page previews (by URL) are kept in SEARCH_CACHE,
+# shared by every ResearchManager run in this process and by other processes using the same file.
+# SEARCH_CACHE=off disables it. Entries expire after their TTL; past SEARCH_CACHE_MAX_ENTRIES per
+# kind the least recently used are evicted. The most recently used SEARCH_CACHE_WARM_ENTRIES are
+# also held in memory, so warm reads do not touch the disk.
+SEARCH_CACHE = os.getenv("SEARCH_CACHE", "search_cache.db")
+SEARCH_CACHE_QUERY_TTL_SECONDS = int(os.getenv("SEARCH_CACHE_QUERY_TTL_SECONDS", "21600"))
+SEARCH_CACHE_PAGE_TTL_SECONDS = int(os.getenv("SEARCH_CACHE_PAGE_TTL_SECONDS", "86400"))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "5000"))
+SEARCH_CACHE_WARM_ENTRIES = int(os.getenv("SEARCH_CACHE_WARM_ENTRIES", "256"))
+
+KINDS = ("query", "page")
+
+
+def query_key(query: str, context: Optional[str] = "") -> str:
+    """Cache key of a search: case, surrounding punctuation and whitespace do not change results."""
+    normalized = " ".join(query.casefold().split()).strip(" .?!")
+    return hashlib.sha256(f"{context}\n{normalized}".encode()).hexdigest()
+
+
+def page_key(url: str) -> str:
+    return re.sub(r"#.*$", "", url.strip())
+
+
+class SearchCache:
+    """Two-tier (memory, SQLite) cache of search results and page previews.
+
+    Concurrent requests for the same entry are coalesced: only the first one calls the API or
+    downloads the page, the others wait for its result, even when they run on another event loop.
+    Failures are never cached.
+    """
+
+    def __init__(
+        self,
+        db_path: str = SEARCH_CACHE,
+        ttl_seconds: Optional[Dict[str, int]] = None,
+        max_entries: int = SEARCH_CACHE_MAX_ENTRIES,
+        warm_entries: int = SEARCH_CACHE_WARM_ENTRIES,
+    ):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds or {"query": SEARCH_CACHE_QUERY_TTL_SECONDS, "page": SEARCH_CACHE_PAGE_TTL_SECONDS}
+        self.max_entries = max_entries
+        self.warm_entries = warm_entries
+        self.enabled = db_path != "off"
+        self.lock = threading.Lock()
+        self.memory: OrderedDict[Tuple[str, str], Tuple[float, Any]] = OrderedDict()
+        self.touched: Dict[Tuple[str, str], float] = {}
+        self.in_flight: Dict[Tuple[str, str], Future] = {}
+        self.warmed = False
+        self.counts = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "coalesced": 0}
+        if self.enabled:
+            with sqlite3.connect(db_path) as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS entries (kind TEXT, key TEXT, value TEXT, stored_at REAL, used_at REAL, PRIMARY KEY (kind, key))"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS entries_used ON entries (kind, used_at)")
+                conn.commit()
+
+    def _remember(self, entry: Tuple[str, str], stored_at: float, value: Any) -> None:
+        with self.lock:
+            self.memory[entry] = (stored_at, value)
+            self.memory.move_to_end(entry)
+            while len(self.memory) > self.warm_entries:
+                self.memory.popitem(last=False)
+
+    def warm(self) -> None:
+        """Load the most recently used fresh entries into memory."""
+        self.warmed = True
+        now = time.time()
+        with sqlite3.connect(self.db_path) as conn:
+            rows = conn.execute(
+                "SELECT kind, key, value, stored_at FROM entries ORDER BY used_at DESC LIMIT ?", (self.warm_entries,)
+            ).fetchall()
+        for kind, key, value, stored_at in reversed(rows):
+            if now - stored_at < self.ttl_seconds[kind]:
+                self._remember((kind, key), stored_at, json.loads(value))
+
+    def _read_memory(self, entry: Tuple[str, str]) -> Tuple[bool, Any]:
+        with self.lock:
+            cached = self.memory.get(entry)
+            if cached is None:
+                return False, None
+            stored_at, value = cached
+            if time.time() - stored_at >= self.ttl_seconds[entry[0]]:
+                del self.memory[entry]
+                return False, None
+            self.memory.move_to_end(entry)
+            # Recorded on disk with the next write, so memory hits keep the entry out of eviction
+            self.touched[entry] = time.time()
+            return True, value
+
+    def _read_disk(self, entry: Tuple[str, str]) -> Tuple[bool, Any]:
+        kind, key = entry
+        now = time.time()
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute(
+                "UPDATE entries SET used_at = ? WHERE kind = ? AND key = ? AND stored_at > ? RETURNING value, stored_at",
+                (now, kind, key, now - self.ttl_seconds[kind]),
+            ).fetchone()
+            conn.commit()
+        if row is None:
+            return False, None
+        value = json.loads(row[0])
+        self._remember(entry, row[1], value)
+        return True, value
+
+    def _write(self, entry: Tuple[str, str], value: Any) -> None:
+        kind, key = entry
+        now = time.time()
+        self._remember(entry, now, value)
+        with self.lock:
+            touched, self.touched = self.touched, {}
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                """
+                INSERT INTO entries (kind, key, value, stored_at, used_at) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(kind, key) DO UPDATE SET value=excluded.value, stored_at=excluded.stored_at, used_at=excluded.used_at
+                """,
+                (kind, key, json.dumps(value), now, now),
+            )
+            conn.executemany(
+                "UPDATE entries SET used_at = MAX(used_at, ?) WHERE kind = ? AND key = ?",
+                [(used_at, k, kk) for (k, kk), used_at in touched.items()],
+            )
+            # Least recently used entries beyond the bound go first; expired ones go regardless
+            conn.execute(
+                "DELETE FROM entries WHERE kind = ? AND (stored_at <= ? OR key IN (SELECT key FROM entries WHERE kind = ? ORDER BY used_at DESC LIMIT -1 OFFSET ?))",
+                (kind, now - self.ttl_seconds[kind], kind, self.max_entries),
+            )
+            conn.commit()
+
+    async def get_or_fetch(self, kind: str, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached value of (kind, key), or await `fetch()` and cache its (JSON-able) result."""
+        if not self.enabled:
+            return await fetch()
+        entry = (kind, key)
+        found, value = self._read_memory(entry)
+        if found:
+            with self.lock:
+                self.counts["memory_hits"] += 1
+            return value
+        with self.lock:
+            waiting = self.in_flight.get(entry)
+            if waiting is None:
+                owner = self.in_flight[entry] = Future()
+            else:
+                # Another search is fetching the same thing right now
+                self.counts["coalesced"] += 1
+        if waiting is not None:
+            return await asyncio.wrap_future(waiting)
+        try:
+            if not self.warmed:
+                await asyncio.to_thread(self.warm)
+                found, value = self._read_memory(entry)
+            if not found:
+                found, value = await asyncio.to_thread(self._read_disk, entry)
+            with self.lock:
+                self.counts["disk_hits" if found else "misses"] += 1
+            if not found:
+                value = await fetch()
+                await asyncio.to_thread(self._write, entry, value)
+            owner.set_result(value)
+            return value
+        except BaseException as e:
+            # Waiters on other tasks must not see this task's cancellation as their own
+            owner.set_exception(RuntimeError(f"{kind} fetch was cancelled") if isinstance(e, asyncio.CancelledError) else e)
+            owner.exception()  # mark retrieved when nobody else is waiting
+            raise
+        finally:
+            with self.lock:
+                del self.in_flight[entry]
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            counts = dict(self.counts)
+        lookups = sum(counts.values())
+        stored = {kind: 0 for kind in KINDS}
+        if self.enabled:
+            with sqlite3.connect(self.db_path) as conn:
+                stored.update(conn.execute("SELECT kind, COUNT(*) FROM entries GROUP BY kind").fetchall())
+        return {
+            **counts,
+            "hit_rate": round((lookups - counts["misses"]) / lookups, 3) if lookups else 0.0,
+            "stored": stored,
+        }
+
+
+cache = SearchCache()
+
+
+if __name__ == "__main__":
+    print(cache.stats())
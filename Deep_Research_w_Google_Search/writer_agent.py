@@ -1,3 +1,5 @@
+import json
+import re
 from pydantic import BaseModel, Field
 from agents import Agent
 
@@ -24,4 +26,47 @@ writer_agent = Agent(
     instructions=INSTRUCTIONS,
     model="gpt-4o-mini",
     output_type=ReportData,
-)
\ No newline at end of file
+)
+
+
+class StreamedField:
+    """Decodes one string field of the writer's JSON output while it is still being generated.
+
+    Fields are generated in schema order, so `markdown_report` starts streaming right after the
+    short summary. `feed` takes raw output deltas and returns the newly decoded field text.
+    """
+
+    def __init__(self, name: str = "markdown_report"):
+        self.opening = re.compile(r'"%s"\s*:\s*"' % re.escape(name))
+        self.raw = ""
+        self.decoded = None  # raw index up to which the value has been decoded
+        self.closed = False
+
+    def feed(self, delta: str) -> str:
+        self.raw += delta
+        if self.closed:
+            return ""
+        if self.decoded is None:
+            match = self.opening.search(self.raw)
+            if not match:
+                return ""
+            self.decoded = match.end()
+        start = safe = i = self.decoded
+        while i < len(self.raw):
+            char = self.raw[i]
+            if char == '"':
+                self.closed = True
+                break
+            if char == "\\":
+                # Never split an escape; a high surrogate (emoji) needs its low half as well
+                escape = self.raw[i + 1:i + 6]
+                needed = 2 if not escape.startswith("u") else 12 if escape[1:3].lower() in ("d8", "d9", "da", "db") else 6
+                if i + needed > len(self.raw):
+                    break
+                i += needed
+            else:
+                i += 1
+            safe = i
+        self.decoded = safe
+        return json.loads('"' + self.raw[start:safe] + '"')
+
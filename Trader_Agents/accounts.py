@@ -4,12 +4,16 @@ from dotenv import load_dotenv
 from datetime import datetime
 from typing import Dict, List, Tuple, Optional
 from market import get_share_price
-from database import write_account, read_account, write_log
+from database import write_account, create_account, read_account, write_log, sync_transactions, query_transactions, aggregate_transactions
 
 load_dotenv(override=True)
 
 INITIAL_BALANCE = 10_000.0
 SPREAD = 0.002
+SUMMARY_TRANSACTIONS = 5
+SUMMARY_TOKEN_BUDGET = 600
+CHARS_PER_TOKEN = 4
+RATIONALE_PREVIEW = 80
 
 
 class Transaction(BaseModel):
@@ -35,7 +39,11 @@ class Account(BaseModel):
     portfolio_value_time_series: List[Tuple[str, float]]
 
     @classmethod
-    def get(cls, name: str) -> "Account":
+    def get(cls, name: str, create: bool = True) -> "Account":
+        """Load an account; a missing one is stored with the initial balance unless `create` is False.
+
+        Pass create=False on read-only paths: the new account is returned without being written.
+        """
         fields = read_account(name.lower())
         if not fields:
             fields = {
@@ -46,12 +54,17 @@ class Account(BaseModel):
                 "transactions": [],
                 "portfolio_value_time_series": []
             }
-            write_account(name, fields)
+            if create:
+                # Another thread or process may create it concurrently; keep whichever landed first
+                create_account(name, fields)
+                fields = read_account(name.lower())
         return cls(**fields)
     
     
     def save(self) -> None:
-        write_account(self.name.lower(), self.model_dump())
+        fields = self.model_dump()
+        write_account(self.name.lower(), fields)
+        sync_transactions(self.name, fields["transactions"])
 
     def reset(self, strategy: str) -> None:
         self.balance = INITIAL_BALANCE
@@ -101,9 +114,9 @@ class Account(BaseModel):
         
         # Update balance
         self.balance -= total_cost
-        self.save()
+        self.record_portfolio_value()
         write_log(self.name, "account", f"Bought {quantity} of {symbol}")
-        return "Completed. Latest details:\n" + self.report()
+        return self.summary()
 
     def sell_shares(self, symbol: str, quantity: int, rationale: str) -> str:
         """Sell shares of a stock if the user has enough shares."""
@@ -129,9 +142,9 @@ class Account(BaseModel):
 
         # Update balance
         self.balance += total_proceeds
-        self.save()
+        self.record_portfolio_value()
         write_log(self.name, "account", f"Sold {quantity} of {symbol}")
-        return "Completed. Latest details:\n" + self.report()
+        return self.summary()
 
     def calculate_portfolio_value(self) -> float:
         """Calculate the total value of the user's portfolio."""
@@ -140,12 +153,14 @@ class Account(BaseModel):
             total_value += get_share_price(symbol) * quantity
         return total_value
 
-    def calculate_profit_loss(self) -> float:
+    def calculate_profit_loss(self, portfolio_value: Optional[float] = None) -> float:
         """Calculate profit/loss relative to cash injected and current holdings.
 
         Interprets PnL as current total portfolio value minus net cash invested.
+        Pass an already computed portfolio value to avoid looking up every price again.
         """
-        portfolio_value = self.calculate_portfolio_value()
+        if portfolio_value is None:
+            portfolio_value = self.calculate_portfolio_value()
         cash_flows = 0.0
         for txn in self.transactions:
             # Positive quantity means cash outflow (buy), negative means inflow (sell)
@@ -167,13 +182,96 @@ class Account(BaseModel):
     def list_transactions(self) -> List[Dict[str, float | int | str]]:
         """List all transactions made by the user."""
         return [transaction.model_dump() for transaction in self.transactions]
+
+    def query_transactions(self, symbol: Optional[str] = None, side: Optional[str] = None, start: Optional[str] = None,
+                           end: Optional[str] = None, limit: int = 20, cursor: Optional[int] = None) -> Dict:
+        """Return one page of transactions (newest first) filtered by symbol, side ("buy"/"sell") and time range.
+
+        Pass the returned next_cursor back to get the following page. Reads the transactions
+        table, which save() keeps in sync.
+        """
+        page, next_cursor = query_transactions(self.name, symbol, side, start, end, limit, cursor)
+        return {"transactions": page, "next_cursor": next_cursor}
+
+    def transaction_totals(self, symbol: Optional[str] = None, side: Optional[str] = None,
+                           start: Optional[str] = None, end: Optional[str] = None) -> Dict[str, Dict]:
+        """Return trade count, shares bought/sold and notional per symbol for the filtered transactions."""
+        return aggregate_transactions(self.name, symbol, side, start, end)
+
+    def cost_basis(self) -> Dict[str, float]:
+        """Return the average cost per share of each current holding, replaying the transactions."""
+        shares: Dict[str, int] = {}
+        cost: Dict[str, float] = {}
+        for txn in self.transactions:
+            held = shares.get(txn.symbol, 0)
+            if txn.quantity > 0:
+                cost[txn.symbol] = cost.get(txn.symbol, 0.0) + txn.total()
+            elif held:
+                # Sells reduce the position at its average cost
+                cost[txn.symbol] = cost.get(txn.symbol, 0.0) * (held + txn.quantity) / held
+            shares[txn.symbol] = held + txn.quantity
+        return {
+            symbol: cost.get(symbol, 0.0) / quantity
+            for symbol, quantity in self.holdings.items()
+            if quantity
+        }
+
+    def record_portfolio_value(self, portfolio_value: Optional[float] = None) -> float:
+        """Append the portfolio value (computed if not given) to the time series and save the account."""
+        if portfolio_value is None:
+            portfolio_value = self.calculate_portfolio_value()
+        self.portfolio_value_time_series.append((datetime.now().strftime("%Y-%m-%d %H:%M:%S"), portfolio_value))
+        self.save()
+        return portfolio_value
+
+    def summary(self, last_k: int = SUMMARY_TRANSACTIONS, token_budget: int = SUMMARY_TOKEN_BUDGET) -> str:
+        """Return a compact json string of the account for prompts.
+
+        Includes cash, holdings with cost basis and current value, PnL and only the last
+        `last_k` transactions. Rationales are shortened and older transactions dropped until
+        the result fits in roughly `token_budget` tokens; the full history stays available
+        through list_transactions. Nothing is written, so it is safe to serve from a reader.
+        """
+        prices = {symbol: get_share_price(symbol) for symbol in self.holdings}
+        basis = self.cost_basis()
+        holdings = {}
+        for symbol, quantity in self.holdings.items():
+            avg_cost = basis.get(symbol, 0.0)
+            value = prices[symbol] * quantity
+            holdings[symbol] = {
+                "quantity": quantity,
+                "avg_cost": round(avg_cost, 2),
+                "price": round(prices[symbol], 2),
+                "value": round(value, 2),
+                "unrealized_pnl": round(value - avg_cost * quantity, 2),
+            }
+        portfolio_value = self.balance + sum(prices[symbol] * quantity for symbol, quantity in self.holdings.items())
+        recent = [txn.model_dump() for txn in self.transactions[-last_k:]] if last_k > 0 else []
+        data = {
+            "name": self.name,
+            "balance": round(self.balance, 2),
+            "holdings": holdings,
+            "total_portfolio_value": round(portfolio_value, 2),
+            "total_profit_loss": round(self.calculate_profit_loss(portfolio_value), 2),
+            "transaction_count": len(self.transactions),
+            "recent_transactions": recent,
+        }
+        max_chars = token_budget * CHARS_PER_TOKEN
+        text = json.dumps(data)
+        if len(text) > max_chars:
+            for txn in recent:
+                if len(txn["rationale"]) > RATIONALE_PREVIEW:
+                    txn["rationale"] = txn["rationale"][:RATIONALE_PREVIEW] + "..."
+            text = json.dumps(data)
+        while len(text) > max_chars and recent:
+            recent.pop(0)
+            text = json.dumps(data)
+        return text
     
     def report(self) -> str:
         """Return a json string representing the account."""
-        portfolio_value = self.calculate_portfolio_value()
-        self.portfolio_value_time_series.append((datetime.now().strftime("%Y-%m-%d %H:%M:%S"), portfolio_value))
-        self.save()
-        pnl = self.calculate_profit_loss()
+        portfolio_value = self.record_portfolio_value()
+        pnl = self.calculate_profit_loss(portfolio_value)
         data = self.model_dump()
         data["total_portfolio_value"] = portfolio_value
         data["total_profit_loss"] = pnl
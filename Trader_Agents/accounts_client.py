@@ -1,40 +1,52 @@
 import json
-from typing import Any, Dict, List
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List
 import mcp
 from mcp.client.stdio import stdio_client
 from mcp import StdioServerParameters
 from agents import FunctionTool
+from mcp_params import mcp_transport
+from mcp_inprocess import in_process_session
 
 params = StdioServerParameters(command="uv", args=["run", "accounts_server.py"], env=None)
 
 
-async def list_accounts_tools() -> List[mcp.types.Tool]:
+@asynccontextmanager
+async def accounts_session() -> AsyncIterator[mcp.ClientSession]:
+    if mcp_transport == "inprocess":
+        async with in_process_session("accounts_server") as session:
+            yield session
+        return
     async with stdio_client(params) as streams:
         async with mcp.ClientSession(*streams) as session:
             await session.initialize()
-            tools_result = await session.list_tools()
-            return tools_result.tools
+            yield session
+
+
+async def list_accounts_tools() -> List[mcp.types.Tool]:
+    async with accounts_session() as session:
+        tools_result = await session.list_tools()
+        return tools_result.tools
         
 async def call_accounts_tool(tool_name: str, tool_args: Dict[str, Any]) -> Any:
-    async with stdio_client(params) as streams:
-        async with mcp.ClientSession(*streams) as session:
-            await session.initialize()
-            result = await session.call_tool(tool_name, tool_args)
-            return result
-            
+    async with accounts_session() as session:
+        result = await session.call_tool(tool_name, tool_args)
+        return result
+        
 async def read_accounts_resource(name: str) -> str:
-    async with stdio_client(params) as streams:
-        async with mcp.ClientSession(*streams) as session:
-            await session.initialize()
-            result = await session.read_resource(f"accounts://accounts_server/{name}")
-            return result.contents[0].text
+    async with accounts_session() as session:
+        result = await session.read_resource(f"accounts://accounts_server/{name}")
+        return result.contents[0].text
         
+async def read_summary_resource(name: str) -> str:
+    async with accounts_session() as session:
+        result = await session.read_resource(f"accounts://summary/{name}")
+        return result.contents[0].text
+
 async def read_strategy_resource(name: str) -> str:
-    async with stdio_client(params) as streams:
-        async with mcp.ClientSession(*streams) as session:
-            await session.initialize()
-            result = await session.read_resource(f"accounts://strategy/{name}")
-            return result.contents[0].text
+    async with accounts_session() as session:
+        result = await session.read_resource(f"accounts://strategy/{name}")
+        return result.contents[0].text
 
 async def get_accounts_tools_openai() -> List[FunctionTool]:
     openai_tools = []
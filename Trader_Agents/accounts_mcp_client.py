@@ -3,6 +3,7 @@ from accounts_client import (
     list_accounts_tools,
     call_accounts_tool,
     read_accounts_resource,
+    read_summary_resource,
     read_strategy_resource,
     get_accounts_tools_openai,
 )
@@ -11,6 +12,7 @@ __all__ = [
     "list_accounts_tools",
     "call_accounts_tool",
     "read_accounts_resource",
+    "read_summary_resource",
     "read_strategy_resource",
     "get_accounts_tools_openai",
 ]
@@ -1,43 +1,76 @@
 from mcp.server.fastmcp import FastMCP
+from metrics import instrument
 from accounts import Account
+from async_db import db
+from database import aggregate_transactions, query_transactions as read_transactions
 
-mcp = FastMCP("accounts_server")
+mcp = instrument(FastMCP("accounts_server"))
 
 @mcp.tool()
 async def get_balance(name: str) -> float:
     """Get the cash balance of the given account name."""
-    return Account.get(name).balance
+    return await db.read(lambda: Account.get(name, create=False).balance)
 
 @mcp.tool()
 async def get_holdings(name: str) -> dict[str, int]:
     """Get the holdings of the given account name."""
-    return Account.get(name).holdings
+    return await db.read(lambda: Account.get(name, create=False).holdings)
 
 @mcp.tool()
 async def buy_shares(name: str, symbol: str, quantity: int, rationale: str) -> str:
     """Buy shares of a stock."""
-    return Account.get(name).buy_shares(symbol, quantity, rationale)
+    return await db.write(lambda: Account.get(name).buy_shares(symbol, quantity, rationale))
 
 
 @mcp.tool()
 async def sell_shares(name: str, symbol: str, quantity: int, rationale: str) -> str:
     """Sell shares of a stock."""
-    return Account.get(name).sell_shares(symbol, quantity, rationale)
+    return await db.write(lambda: Account.get(name).sell_shares(symbol, quantity, rationale))
+
+@mcp.tool()
+async def list_transactions(name: str) -> list[dict]:
+    """List the full transaction history of the given account name, including rationales."""
+    return await db.read(lambda: Account.get(name, create=False).list_transactions())
+
+@mcp.tool()
+async def query_transactions(name: str, symbol: str = "", side: str = "", start: str = "", end: str = "", limit: int = 20, cursor: int | None = None) -> dict:
+    """Query the transaction history of the given account name, newest first.
+
+    Args:
+        name: The account name
+        symbol: Only transactions in this symbol (empty for all)
+        side: "buy" or "sell" (empty for both)
+        start: Earliest timestamp, "YYYY-MM-DD" or "YYYY-MM-DD HH:MM:SS" (empty for no bound)
+        end: Latest timestamp, inclusive (empty for no bound)
+        limit: Maximum number of transactions to return (1 to 200)
+        cursor: The next_cursor of the previous page, to continue paging
+    """
+    page, next_cursor = await db.read(read_transactions, name, symbol or None, side or None, start or None, end or None, limit, cursor)
+    return {"transactions": page, "next_cursor": next_cursor}
+
+@mcp.tool()
+async def transaction_totals(name: str, symbol: str = "", side: str = "", start: str = "", end: str = "") -> dict[str, dict]:
+    """Get trade count, shares bought and sold, and notional traded per symbol for the given account name,
+    filtered like query_transactions."""
+    return await db.read(aggregate_transactions, name, symbol or None, side or None, start or None, end or None)
 
 @mcp.tool()
 async def change_strategy(name: str, strategy: str) -> str:
     """Change the investment strategy string for this account."""
-    return Account.get(name).change_strategy(strategy)
+    return await db.write(lambda: Account.get(name).change_strategy(strategy))
 
 @mcp.resource("accounts://accounts_server/{name}")
 async def read_account_resource(name: str) -> str:
-    account = Account.get(name.lower())
-    return account.report()
+    return await db.write(lambda: Account.get(name.lower()).report())
+
+@mcp.resource("accounts://summary/{name}")
+async def read_summary_resource(name: str) -> str:
+    return await db.read(lambda: Account.get(name.lower(), create=False).summary())
 
 @mcp.resource("accounts://strategy/{name}")
 async def read_strategy_resource(name: str) -> str:
-    account = Account.get(name.lower())
-    return account.get_strategy()
+    # get_strategy logs the read, so it goes through the writer
+    return await db.write(lambda: Account.get(name.lower()).get_strategy())
 
 if __name__ == "__main__":
     mcp.run(transport='stdio')
\ No newline at end of file
@@ -0,0 +1,229 @@
+import asyncio
+import heapq
+import itertools
+import json
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+from dotenv import load_dotenv
+from agents import Model, ModelProvider, ModelResponse
+
+load_dotenv(override=True)
+
+# Lower number wins: a waiting trade is admitted before a rebalance, research or report call
+LANES: Dict[str, int] = {"trade": 0, "rebalance": 1, "research": 2, "report": 3}
+DEFAULT_LANE = "research"
+
+# (requests per minute, tokens per minute) per provider; override with
+# RATE_LIMITS="openai=500:200000,deepseek=60:100000"
+DEFAULT_LIMITS: Dict[str, Tuple[float, float]] = {
+    "openai": (500, 200_000),
+    "openrouter": (200, 200_000),
+    "deepseek": (60, 100_000),
+    "grok": (60, 100_000),
+    "gemini": (60, 100_000),
+}
+OUTPUT_TOKEN_RESERVE = 500
+CHARS_PER_TOKEN = 4
+
+current_lane: ContextVar[str] = ContextVar("current_lane", default=DEFAULT_LANE)
+
+
+def limits_from_env(value: Optional[str] = None) -> Dict[str, Tuple[float, float]]:
+    """Default limits overridden by `value` (RATE_LIMITS when not given), e.g. "openai=500:200000"."""
+    if value is None:
+        value = os.getenv("RATE_LIMITS")
+    limits = dict(DEFAULT_LIMITS)
+    for entry in filter(None, (value or "").split(",")):
+        provider, rates = entry.split("=")
+        rpm, tpm = rates.split(":")
+        limits[provider.strip()] = (float(rpm), float(tpm))
+    return limits
+
+
+@contextmanager
+def lane(name: str) -> Iterator[None]:
+    """Run the model calls made inside this block (including sub-agents and tools) in the given lane."""
+    token = current_lane.set(name)
+    try:
+        yield
+    finally:
+        current_lane.reset(token)
+
+
+def estimate_tokens(system_instructions: Optional[str], input: Any) -> int:
+    text = (system_instructions or "") + (input if isinstance(input, str) else json.dumps(input, default=str))
+    return len(text) // CHARS_PER_TOKEN + OUTPUT_TOKEN_RESERVE
+
+
+class TokenBucket:
+    """Continuously refilling bucket holding at most one minute of capacity."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60
+        self.level = per_minute
+        self.updated = time.monotonic()
+
+    def refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_for(self, amount: float) -> float:
+        """Seconds until `amount` is available (requests larger than capacity wait for a full bucket)."""
+        self.refill()
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate)
+
+
+@dataclass
+class LaneStats:
+    admitted: int = 0
+    queued_seconds: float = 0.0
+    max_queued_seconds: float = 0.0
+
+    def record(self, waited: float) -> None:
+        self.admitted += 1
+        self.queued_seconds += waited
+        self.max_queued_seconds = max(self.max_queued_seconds, waited)
+
+
+@dataclass
+class ProviderGate:
+    requests: TokenBucket
+    tokens: TokenBucket
+    waiters: List[Tuple[int, int, int, asyncio.Future]] = field(default_factory=list)
+    timer: Optional[asyncio.TimerHandle] = None
+    lanes: Dict[str, LaneStats] = field(default_factory=dict)
+
+
+class AdmissionController:
+    """Per-provider request and token buckets shared by every agent run in the process.
+
+    Calls wait in a priority queue per provider; the head of the queue is admitted as soon as
+    both buckets can cover it, so lower lanes never overtake a waiting higher-priority call.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, Tuple[float, float]]] = None):
+        self.limits = limits if limits is not None else limits_from_env()
+        self.gates: Dict[str, ProviderGate] = {}
+        self.sequence = itertools.count()
+
+    def gate(self, provider: str) -> Optional[ProviderGate]:
+        if provider not in self.limits:
+            return None
+        if provider not in self.gates:
+            rpm, tpm = self.limits[provider]
+            self.gates[provider] = ProviderGate(TokenBucket(rpm), TokenBucket(tpm))
+        return self.gates[provider]
+
+    async def acquire(self, provider: str, tokens: int, lane_name: Optional[str] = None) -> float:
+        """Wait for admission and return the seconds spent queued."""
+        gate = self.gate(provider)
+        if gate is None:
+            return 0.0
+        lane_name = lane_name or current_lane.get()
+        start = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(gate.waiters, (LANES.get(lane_name, len(LANES)), next(self.sequence), tokens, future))
+        self._pump(gate)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Admitted just before cancellation: give the capacity back
+                gate.requests.level += 1
+                gate.tokens.level += tokens
+            else:
+                gate.waiters = [w for w in gate.waiters if w[3] is not future]
+                heapq.heapify(gate.waiters)
+            self._pump(gate)
+            raise
+        waited = time.monotonic() - start
+        gate.lanes.setdefault(lane_name, LaneStats()).record(waited)
+        return waited
+
+    def settle(self, provider: str, estimated: int, actual: int) -> None:
+        """Correct the token bucket once the real usage of an admitted call is known."""
+        gate = self.gate(provider)
+        if gate is not None and actual:
+            gate.tokens.level -= actual - estimated
+
+    def _pump(self, gate: ProviderGate) -> None:
+        if gate.timer is not None:
+            gate.timer.cancel()
+            gate.timer = None
+        while gate.waiters:
+            _, _, tokens, future = gate.waiters[0]
+            if future.done():
+                heapq.heappop(gate.waiters)
+                continue
+            wait = max(gate.requests.wait_for(1), gate.tokens.wait_for(tokens))
+            if wait > 0:
+                gate.timer = asyncio.get_running_loop().call_later(wait, self._pump, gate)
+                return
+            heapq.heappop(gate.waiters)
+            gate.requests.level -= 1
+            gate.tokens.level -= tokens
+            future.set_result(None)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            provider: {
+                "queued": len(gate.waiters),
+                "requests_available": round(gate.requests.level, 1),
+                "tokens_available": round(gate.tokens.level),
+                "lanes": {name: vars(stats) for name, stats in gate.lanes.items()},
+            }
+            for provider, gate in self.gates.items()
+        }
+
+
+class AdmittedModel(Model):
+    """Model wrapper that waits for admission from the controller before every request."""
+
+    def __init__(self, model: Model, provider: str, controller: AdmissionController):
+        self.model = model
+        self.provider = provider
+        self.controller = controller
+
+    async def get_response(self, system_instructions, input, *args, **kwargs) -> ModelResponse:
+        estimate = estimate_tokens(system_instructions, input)
+        await self.controller.acquire(self.provider, estimate)
+        response = await self.model.get_response(system_instructions, input, *args, **kwargs)
+        self.controller.settle(self.provider, estimate, response.usage.total_tokens)
+        return response
+
+    async def stream_response(self, system_instructions, input, *args, **kwargs) -> AsyncIterator[Any]:
+        estimate = estimate_tokens(system_instructions, input)
+        await self.controller.acquire(self.provider, estimate)
+        async for event in self.model.stream_response(system_instructions, input, *args, **kwargs):
+            if getattr(event, "type", None) == "response.completed" and event.response.usage:
+                self.controller.settle(self.provider, estimate, event.response.usage.total_tokens)
+            yield event
+
+
+class AdmissionProvider(ModelProvider):
+    """ModelProvider wrapper admitting every model it hands out through the controller."""
+
+    def __init__(self, provider: ModelProvider, controller: AdmissionController, provider_name: str = "openai"):
+        self.provider = provider
+        self.controller = controller
+        self.provider_name = provider_name
+
+    def get_model(self, model_name: str | None) -> Model:
+        return AdmittedModel(self.provider.get_model(model_name), self.provider_name, self.controller)
+
+
+controller = AdmissionController()
+
+
+def admitted(provider: ModelProvider, provider_name: str = "openai") -> ModelProvider:
+    """Wrap a provider with the shared controller, unless responses are replayed from a local store."""
+    if os.getenv("MODEL_MODE") == "replay":
+        return provider
+    return AdmissionProvider(provider, controller, provider_name)
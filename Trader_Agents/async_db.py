@@ -0,0 +1,45 @@
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+# DB_OFFLOAD=1 moves database work off the event loop; DB_READERS threads serve read-only tool calls.
+# Off by default: on a local disk the thread hand-off costs more than the queries it moves
+# (see bench_async_db.py), it pays off when storage is slow
+DB_READERS = int(os.getenv("DB_READERS", "4"))
+DB_OFFLOAD = os.getenv("DB_OFFLOAD", "0") == "1"
+
+T = TypeVar("T")
+
+
+class AsyncDB:
+    """Runs blocking sqlite3 work off the event loop of an async MCP server.
+
+    Everything that writes goes through a single writer thread, so read-modify-write sequences
+    (load an account, trade, save it) stay serialized exactly as they were on the event loop.
+    Read-only work runs on a pool of reader threads, which WAL mode lets proceed while a write
+    is in progress.
+    """
+
+    def __init__(self, readers: int = DB_READERS, offload: bool = DB_OFFLOAD):
+        self.offload = offload
+        self.writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-writer")
+        self.readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="db-reader")
+
+    async def _run(self, executor: ThreadPoolExecutor, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        if not self.offload:
+            return fn(*args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(executor, functools.partial(fn, *args, **kwargs))
+
+    async def read(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        return await self._run(self.readers, fn, *args, **kwargs)
+
+    async def write(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        return await self._run(self.writer, fn, *args, **kwargs)
+
+
+db = AsyncDB()
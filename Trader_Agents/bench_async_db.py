@@ -0,0 +1,135 @@
+"""Concurrent tool-call throughput of accounts_server and memory_server, with and without DB offloading.
+
+Hosts both servers in-process against a temporary accounts.db and memory store, then fires a
+read-heavy mix of tool calls (holdings, transaction queries, memory reads, plus some memory writes
+and trades) with the given concurrency. The same workload runs with database work inline on the
+event loop (DB_OFFLOAD=0, the default) and offloaded to the writer thread and reader pool.
+The two modes alternate for --repeat rounds and the median of each figure is printed, since a
+single round on a busy machine is too noisy to compare tail latencies.
+
+--io-latency-ms adds a sleep to every sqlite3 connection the servers open, standing in for slow
+storage (a network filesystem, a cold or contended disk). Inline, the sleep blocks the event loop;
+offloaded, it only blocks a database thread.
+
+Usage:
+    uv run bench_async_db.py --calls 400 --concurrency 32 --repeat 5
+    uv run bench_async_db.py --io-latency-ms 2
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from typing import Dict, List
+
+
+def seed(accounts: int, transactions: int) -> None:
+    from accounts import Account
+
+    for i in range(accounts):
+        account = Account.get(f"bench{i}")
+        account.reset("Benchmark strategy")
+        for n in range(transactions):
+            account.buy_shares(random.choice(["AAPL", "MSFT", "NVDA", "SPY"]), 1, f"Seed trade {n} " + "x" * 200)
+
+
+def slow_storage(latency: float) -> None:
+    """Make every new sqlite3 connection wait `latency` seconds first, as if on slow storage."""
+    connect = sqlite3.connect
+
+    def slow_connect(*args, **kwargs):
+        time.sleep(latency)
+        return connect(*args, **kwargs)
+
+    sqlite3.connect = slow_connect
+
+
+def workload(calls: int, accounts: int) -> List[tuple]:
+    mix = []
+    for i in range(calls):
+        name = f"bench{i % accounts}"
+        roll = random.random()
+        if roll < 0.3:
+            mix.append(("accounts", "get_holdings", {"name": name}))
+        elif roll < 0.55:
+            mix.append(("accounts", "query_transactions", {"name": name, "symbol": "AAPL", "limit": 10}))
+        elif roll < 0.65:
+            mix.append(("accounts", "transaction_totals", {"name": name}))
+        elif roll < 0.85:
+            mix.append(("memory", "memory_list", {"namespace": name}))
+        elif roll < 0.95:
+            mix.append(("memory", "memory_put", {"namespace": name, "key": f"k{i}", "value": "v" * 500}))
+        else:
+            mix.append(("accounts", "buy_shares", {"name": name, "symbol": "SPY", "quantity": 1, "rationale": "bench"}))
+    return mix
+
+
+async def run(calls: List[tuple], concurrency: int, offload: bool) -> Dict[str, float]:
+    import async_db
+    from mcp_inprocess import in_process_session
+
+    async_db.db.offload = offload
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    async with in_process_session("accounts_server") as accounts, in_process_session("memory_server") as memory:
+        sessions = {"accounts": accounts, "memory": memory}
+
+        async def one(server: str, tool: str, args: dict) -> None:
+            async with semaphore:
+                start = time.perf_counter()
+                result = await sessions[server].call_tool(tool, args)
+                latencies.append(time.perf_counter() - start)
+                if result.isError:
+                    raise RuntimeError(f"{tool} failed: {result.content}")
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(*call) for call in calls))
+        wall = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "calls_per_second": len(calls) / wall,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Concurrent MCP tool-call throughput with and without DB offloading")
+    parser.add_argument("--calls", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--accounts", type=int, default=8)
+    parser.add_argument("--transactions", type=int, default=200, help="seeded transactions per account")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5, help="rounds of each mode; medians are reported")
+    parser.add_argument("--io-latency-ms", type=float, default=0, help="simulated storage latency per sqlite3 connection")
+    cli = parser.parse_args()
+
+    random.seed(cli.seed)
+    logging.getLogger("mcp").setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory(prefix="bench_async_db_") as workdir:
+        os.chdir(workdir)
+        import accounts
+        import market
+
+        market.start_prefetch_thread = lambda: None
+        accounts.get_share_price = lambda symbol: 10.0
+        seed(cli.accounts, cli.transactions)
+        if cli.io_latency_ms:
+            slow_storage(cli.io_latency_ms / 1000)
+        calls = workload(cli.calls, cli.accounts)
+        results: Dict[str, List[Dict[str, float]]] = {"inline": [], "offloaded": []}
+        for _ in range(cli.repeat):
+            for label, offload in (("inline", False), ("offloaded", True)):
+                results[label].append(asyncio.run(run(calls, cli.concurrency, offload)))
+        for label, rounds in results.items():
+            median = {key: statistics.median(r[key] for r in rounds) for key in rounds[0]}
+            print(f"{label:10} {median['calls_per_second']:8.1f} calls/s  p50 {median['p50_ms']:7.1f}ms  p95 {median['p95_ms']:7.1f}ms"
+                  f"  (median of {len(rounds)}; p95 {min(r['p95_ms'] for r in rounds):.1f}-{max(r['p95_ms'] for r in rounds):.1f}ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Compare MCP tool-call latency between stdio subprocesses and in-process hosting.
+
+Usage:
+    uv run bench_mcp_transport.py --calls 200
+
+Servers are spawned with the current interpreter rather than `uv run`, so the stdio numbers
+measure the transport itself and exclude uv's environment resolution (which only makes stdio slower).
+"""
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import sys
+import time
+from typing import Any, Dict, List
+from agents.mcp import MCPServerStdio
+from mcp_inprocess import MCPServerInProcess
+
+SERVERS = {
+    "push_server": ("send_notification", {"title": "bench", "body": "latency probe"}),
+    "accounts_server": ("get_balance", {"name": "bench"}),
+}
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def bench_server(server, tool: str, args: Dict[str, Any], calls: int) -> Dict[str, float]:
+    start = time.perf_counter()
+    await server.connect()
+    connect_ms = (time.perf_counter() - start) * 1000
+    try:
+        await server.call_tool(tool, args)  # warm-up
+        samples = []
+        for _ in range(calls):
+            t0 = time.perf_counter()
+            await server.call_tool(tool, args)
+            samples.append((time.perf_counter() - t0) * 1000)
+    finally:
+        await server.cleanup()
+    return {
+        "connect_ms": round(connect_ms, 2),
+        "mean_ms": round(statistics.mean(samples), 3),
+        "p50_ms": round(percentile(samples, 50), 3),
+        "p95_ms": round(percentile(samples, 95), 3),
+    }
+
+
+async def main(calls: int) -> List[Dict[str, Any]]:
+    rows = []
+    for module, (tool, args) in SERVERS.items():
+        stdio = MCPServerStdio({"command": sys.executable, "args": [f"{module}.py"]}, client_session_timeout_seconds=120)
+        inprocess = MCPServerInProcess({"module": module}, client_session_timeout_seconds=120)
+        for mode, server in (("stdio", stdio), ("inprocess", inprocess)):
+            result = await bench_server(server, tool, args, calls)
+            rows.append({"server": module, "tool": tool, "mode": mode, "calls": calls, **result})
+            print(f"{module:16} {mode:10} connect {result['connect_ms']:9.2f} ms   "
+                  f"mean {result['mean_ms']:8.3f} ms   p50 {result['p50_ms']:8.3f} ms   p95 {result['p95_ms']:8.3f} ms")
+    return rows
+
+
+if __name__ == "__main__":
+    logging.getLogger("mcp").setLevel(logging.WARNING)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=100, help="tool calls per server and mode")
+    parser.add_argument("--json", dest="json_path", help="optionally write the results to this file")
+    cli = parser.parse_args()
+    rows = asyncio.run(main(cli.calls))
+    if cli.json_path:
+        with open(cli.json_path, "w") as f:
+            json.dump(rows, f, indent=2)
@@ -0,0 +1,152 @@
+"""Exercise the model registry against local stub chat-completions servers.
+
+Starts a slow "primary", a failing primary and a fast "secondary" OpenAI-compatible stub on
+localhost, then checks routing, hedging and the error/fallback path, and prints latency and the
+registry's rolling stats for each scenario. A failed check exits with an AssertionError.
+
+Usage:
+    uv run bench_model_registry.py --requests 20 --slow 1.5 --hedge-after 0.3
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import Dict
+from agents import ModelSettings, ModelTracing
+from model_registry import HEDGE_DEFAULT_SECONDS, MIN_SAMPLES_FOR_P95, ModelRegistry, provider_for
+
+STUB_RESPONSE = {
+    "id": "chatcmpl-stub",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "stub",
+    "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": "ok"}}],
+    "usage": {"prompt_tokens": 5, "completion_tokens": 1, "total_tokens": 6},
+}
+
+
+async def start_stub(delay: float, fail_every: int = 0) -> asyncio.AbstractServer:
+    """Minimal HTTP/1.1 keep-alive server answering every POST with a canned chat completion."""
+    served = 0
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        nonlocal served
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.decode().split("\r\n"):
+                    if line.lower().startswith("content-length:"):
+                        length = int(line.split(":", 1)[1])
+                await reader.readexactly(length)
+                served += 1
+                await asyncio.sleep(delay)
+                failing = fail_every and served % fail_every == 0
+                body = json.dumps({"error": {"message": "stub failure"}} if failing else STUB_RESPONSE).encode()
+                status = "500 Internal Server Error" if failing else "200 OK"
+                writer.write(
+                    f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+                    f"Connection: keep-alive\r\n\r\n".encode() + body
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, "127.0.0.1", 0)
+
+
+def port(server: asyncio.AbstractServer) -> int:
+    return server.sockets[0].getsockname()[1]
+
+
+async def run(registry: ModelRegistry, model_name: str, requests: int, hedge_after: float | None) -> Dict[str, float]:
+    model = registry.get_model(model_name, hedge_model="stub/secondary" if hedge_after else None, hedge_after=hedge_after)
+    latencies = []
+    errors = 0
+
+    async def one() -> None:
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            await model.get_response(
+                None, "ping", ModelSettings(), [], None, [], ModelTracing.DISABLED, previous_response_id=None
+            )
+        except Exception:
+            errors += 1
+        latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one() for _ in range(requests)))
+    latencies.sort()
+    return {"mean": sum(latencies) / len(latencies), "max": latencies[-1], "errors": errors}
+
+
+async def scenario(label: str, providers, model_name: str, requests: int, hedge_after: float | None):
+    registry = ModelRegistry(providers=providers, max_connections=requests, max_keepalive_connections=requests)
+    result = await run(registry, model_name, requests, hedge_after)
+    await registry.aclose()
+    stats = registry.snapshot()
+    print(f"{label:17} mean {result['mean']:.3f}s  max {result['max']:.3f}s  errors {result['errors']}  stats {json.dumps(stats)}")
+    return result, stats
+
+
+async def main(requests: int, slow: float, hedge_after: float) -> None:
+    assert hedge_after < slow, "--hedge-after must be below --slow for the hedge to win"
+    # Routing is by model name: "a/b" names go to OpenRouter, "deepseek-*" to DeepSeek, the rest to OpenAI
+    assert provider_for("deepseek-chat") == "deepseek"
+    assert provider_for("meta-llama/llama-3.3-70b") == "openrouter"
+    assert provider_for("grok-3-mini") == "grok"
+    assert provider_for("gemini-2.0-flash") == "gemini"
+    assert provider_for("gpt-4o-mini") == "openai"
+    assert ModelRegistry().hedge_threshold("deepseek", None) == HEDGE_DEFAULT_SECONDS
+
+    primary = await start_stub(slow)
+    # Every response fails; the client's retries fail as well
+    failing = await start_stub(0.02, fail_every=1)
+    secondary = await start_stub(0.02)
+    os.environ.setdefault("STUB_KEY", "stub")
+    slow_providers = {
+        "deepseek": (f"http://127.0.0.1:{port(primary)}/v1", "STUB_KEY"),
+        "openrouter": (f"http://127.0.0.1:{port(secondary)}/v1", "STUB_KEY"),
+    }
+    failing_providers = {**slow_providers, "deepseek": (f"http://127.0.0.1:{port(failing)}/v1", "STUB_KEY")}
+    async with primary, failing, secondary:
+        result, stats = await scenario("no hedge", slow_providers, "deepseek-stub", requests, None)
+        assert result["errors"] == 0 and result["mean"] >= slow
+        assert set(stats) == {"deepseek"} and stats["deepseek"]["requests"] == requests
+        assert stats["deepseek"]["hedges"] == 0
+
+        result, stats = await scenario("hedged", slow_providers, "deepseek-stub", requests, hedge_after)
+        assert result["errors"] == 0 and result["max"] < slow
+        assert stats["deepseek"]["hedges"] == stats["deepseek"]["hedge_wins"] == requests
+        assert stats["openrouter"]["requests"] == requests and stats["openrouter"]["error_rate"] == 0
+        # Every primary was cancelled by its hedge and counts as a timeout
+        assert stats["deepseek"]["requests"] == requests and stats["deepseek"]["error_rate"] == 1
+
+        result, stats = await scenario("failing, no hedge", failing_providers, "deepseek-stub", requests, None)
+        assert result["errors"] == requests
+        assert stats["deepseek"]["error_rate"] == 1 and "openrouter" not in stats
+
+        result, stats = await scenario("failing, hedged", failing_providers, "deepseek-stub", requests, hedge_after)
+        assert result["errors"] == 0
+        assert stats["deepseek"]["hedge_wins"] == requests and stats["deepseek"]["error_rate"] == 1
+
+        # With enough samples the threshold follows the provider's p95 instead of the default
+        registry = ModelRegistry(providers=slow_providers)
+        model = registry.get_model("stub/secondary")
+        for _ in range(MIN_SAMPLES_FOR_P95):
+            await model.get_response(None, "ping", ModelSettings(), [], None, [], ModelTracing.DISABLED, previous_response_id=None)
+        await registry.aclose()
+        assert registry.hedge_threshold("openrouter", None) < HEDGE_DEFAULT_SECONDS
+    print("All checks passed")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Model registry hedging against local stub servers")
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--slow", type=float, default=1.5, help="primary stub latency in seconds")
+    parser.add_argument("--hedge-after", type=float, default=0.3, help="hedge threshold in seconds")
+    cli = parser.parse_args()
+    asyncio.run(main(cli.requests, cli.slow, cli.hedge_after))
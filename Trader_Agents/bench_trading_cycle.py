@@ -0,0 +1,251 @@
+"""Offline end-to-end benchmark of the trading cycle.
+
+Runs N traders for M cycles against a scripted model, a deterministic fake market feed and a
+temporary accounts.db, with the local MCP servers hosted in-process. Every run appends one JSON
+line to the results file so regressions in the accounts/database/traders hot paths can be tracked.
+
+Usage:
+    uv run bench_trading_cycle.py --traders 4 --cycles 3 --output bench_results.jsonl
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+
+SYMBOLS = ["AAPL", "MSFT", "NVDA", "AMZN", "GOOG", "META", "TSLA", "SPY"]
+
+counters: Dict[str, int] = {
+    "subprocess_spawns": 0,
+    "sqlite_connections": 0,
+    "sqlite_commits": 0,
+    "mcp_calls": 0,
+    "model_calls": 0,
+    "prompt_bytes": 0,
+}
+
+
+class CountingConnection(sqlite3.Connection):
+    def commit(self):
+        counters["sqlite_commits"] += 1
+        return super().commit()
+
+    def __exit__(self, exc_type, exc, tb):
+        # Leaving a `with sqlite3.connect(...)` block commits any open transaction
+        if exc_type is None and self.in_transaction:
+            counters["sqlite_commits"] += 1
+        return super().__exit__(exc_type, exc, tb)
+
+
+def install_counters() -> None:
+    """Count subprocess spawns, SQLite connections/commits and MCP requests for the whole process."""
+    import mcp
+
+    connect = sqlite3.connect
+
+    def counting_connect(*args, **kwargs):
+        counters["sqlite_connections"] += 1
+        kwargs.setdefault("factory", CountingConnection)
+        return connect(*args, **kwargs)
+
+    sqlite3.connect = counting_connect
+
+    popen_init = subprocess.Popen.__init__
+
+    def counting_popen(self, *args, **kwargs):
+        counters["subprocess_spawns"] += 1
+        popen_init(self, *args, **kwargs)
+
+    subprocess.Popen.__init__ = counting_popen
+
+    for method in ("call_tool", "read_resource"):
+        original = getattr(mcp.ClientSession, method)
+
+        async def counting(self, *args, _original=original, **kwargs):
+            counters["mcp_calls"] += 1
+            return await _original(self, *args, **kwargs)
+
+        setattr(mcp.ClientSession, method, counting)
+
+
+def fake_share_price(symbol: str) -> float:
+    """Deterministic fake feed: a fixed base per symbol with a small drift per cycle."""
+    base = 20 + (sum(map(ord, symbol)) % 80)
+    return round(base * (1 + 0.01 * ((fake_share_price.cycle + len(symbol)) % 5 - 2)), 2)
+
+
+fake_share_price.cycle = 0
+
+
+def make_scripted_model():
+    from openai.types.responses import (
+        Response, ResponseCompletedEvent, ResponseFunctionToolCall, ResponseOutputMessage, ResponseOutputText, ResponseUsage,
+    )
+    from openai.types.responses.response_usage import InputTokensDetails, OutputTokensDetails
+    from agents import Model, ModelResponse, Usage
+
+    class ScriptedModel(Model):
+        """Deterministic stand-in for an LLM that walks a fixed tool-calling script."""
+
+        def __init__(self, model_name: str):
+            self.model_name = model_name
+
+        def script(self, system_instructions: str, prompt: str) -> List[tuple]:
+            if "financial researcher" in system_instructions:
+                topic = prompt[:60]
+                return [("memory_put", {"namespace": "research", "key": topic, "value": f"Notes on {topic}"})]
+            name = system_instructions.split("You are ", 1)[1].split(",", 1)[0]
+            symbol = SYMBOLS[sum(map(ord, name)) % len(SYMBOLS)]
+            trade = "sell_shares" if "rebalance" in prompt else "buy_shares"
+            return [
+                ("Researcher", {"input": f"Latest news on {symbol}"}),
+                ("lookup_share_price", {"symbol": symbol}),
+                (trade, {"name": name, "symbol": symbol, "quantity": 1, "rationale": f"Scripted {trade}"}),
+                ("send_notification", {"title": f"{name} update", "body": f"{trade} {symbol}"}),
+            ]
+
+        async def get_response(self, system_instructions, input, model_settings, tools, output_schema, handoffs, tracing, *, previous_response_id=None):
+            items = [{"role": "user", "content": input}] if isinstance(input, str) else input
+            context = json.dumps([system_instructions, items], default=str)
+            counters["model_calls"] += 1
+            counters["prompt_bytes"] += len(context.encode())
+            prompt = items[0].get("content", "") if isinstance(items[0], dict) else ""
+            done = sum(1 for item in items if isinstance(item, dict) and item.get("type") == "function_call_output")
+            steps = self.script(system_instructions or "", str(prompt))
+            if done < len(steps):
+                tool, args = steps[done]
+                output = [ResponseFunctionToolCall(
+                    arguments=json.dumps(args), call_id=f"call_{done}", name=tool,
+                    type="function_call", id=f"fc_{done}",
+                )]
+            else:
+                output = [ResponseOutputMessage(
+                    id="msg_final", role="assistant", status="completed", type="message",
+                    content=[ResponseOutputText(annotations=[], text="Scripted run complete.", type="output_text")],
+                )]
+            tokens = len(context) // 4
+            return ModelResponse(
+                output=output,
+                usage=Usage(requests=1, input_tokens=tokens, output_tokens=20, total_tokens=tokens + 20),
+                response_id=None,
+            )
+
+        async def stream_response(self, system_instructions, input, model_settings, tools, output_schema, handoffs, tracing, *, previous_response_id=None):
+            # Streamed runs get the same scripted step as a single completed event
+            response = await self.get_response(
+                system_instructions, input, model_settings, tools, output_schema, handoffs, tracing,
+                previous_response_id=previous_response_id,
+            )
+            yield ResponseCompletedEvent(
+                response=Response(
+                    id="scripted", created_at=time.time(), model=self.model_name, object="response",
+                    output=response.output, tool_choice="auto", tools=[], parallel_tool_calls=False,
+                    usage=ResponseUsage(
+                        input_tokens=response.usage.input_tokens,
+                        input_tokens_details=InputTokensDetails(cached_tokens=0),
+                        output_tokens=response.usage.output_tokens,
+                        output_tokens_details=OutputTokensDetails(reasoning_tokens=0),
+                        total_tokens=response.usage.total_tokens,
+                    ),
+                ),
+                sequence_number=0,
+                type="response.completed",
+            )
+
+    return ScriptedModel
+
+
+def install_offline() -> None:
+    """Swap in the scripted model, the fake market feed and in-process MCP servers.
+
+    Also usable as a fleet worker setup: uv run fleet.py Bench0 Bench1 --setup bench_trading_cycle:install_offline
+    """
+    os.environ["MCP_TRANSPORT"] = "inprocess"
+    import market
+    import traders
+    from agents import set_tracing_disabled
+    from mcp_params import mcp_transport
+
+    if mcp_transport != "inprocess":
+        raise RuntimeError("MCP_TRANSPORT is overridden in .env; the benchmark needs MCP_TRANSPORT=inprocess")
+
+    set_tracing_disabled(True)
+    logging.getLogger("mcp").setLevel(logging.WARNING)
+    market.polygon_api_key = "offline"
+    market.is_paid_polygon = False
+    market.is_simulated_market = False
+    market.get_share_price_polygon = fake_share_price
+    market.start_prefetch_thread = lambda: None
+    traders.get_model = make_scripted_model()
+    traders.MARKET_HOURS_GATE = "off"
+
+
+async def run_benchmark(num_traders: int, num_cycles: int) -> Dict[str, Any]:
+    install_offline()
+    import traders
+
+    fleet = [traders.Trader(f"Bench{i}") for i in range(num_traders)]
+    cycles = []
+    errors = 0
+    for cycle in range(num_cycles):
+        fake_share_price.cycle = cycle
+        before = dict(counters)
+        start = time.perf_counter()
+        results = await asyncio.gather(*(trader.run_with_trace() for trader in fleet), return_exceptions=True)
+        wall = time.perf_counter() - start
+        for trader, result in zip(fleet, results):
+            if isinstance(result, BaseException):
+                errors += 1
+                print(f"Error running trader {trader.name}: {result}")
+            trader.do_trade = not trader.do_trade
+        cycles.append({
+            "cycle": cycle,
+            "wall_seconds": round(wall, 4),
+            **{key: counters[key] - before[key] for key in counters},
+        })
+        print(f"cycle {cycle}: {wall:.3f}s  " + "  ".join(f"{k}={v}" for k, v in cycles[-1].items() if k not in ("cycle", "wall_seconds")))
+    walls = [c["wall_seconds"] for c in cycles]
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "traders": num_traders,
+        "cycles": num_cycles,
+        "errors": errors,
+        "mean_cycle_seconds": round(sum(walls) / len(walls), 4),
+        "totals": dict(counters),
+        "per_cycle": cycles,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark of the trading cycle")
+    parser.add_argument("--traders", type=int, default=4)
+    parser.add_argument("--cycles", type=int, default=3)
+    parser.add_argument("--output", default="bench_results.jsonl", help="JSON lines file to append the results to")
+    parser.add_argument("--seed", type=int, default=0)
+    cli = parser.parse_args()
+
+    output = os.path.abspath(cli.output)
+    random.seed(cli.seed)
+    install_counters()
+
+    # database.py and memory_server.py resolve their SQLite files relative to the working directory
+    with tempfile.TemporaryDirectory(prefix="bench_trading_") as workdir:
+        os.chdir(workdir)
+        result = asyncio.run(run_benchmark(cli.traders, cli.cycles))
+    with open(output, "a") as f:
+        f.write(json.dumps(result) + "\n")
+    print(f"Mean cycle: {result['mean_cycle_seconds']}s, errors: {result['errors']}; appended to {output}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
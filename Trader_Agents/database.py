@@ -1,14 +1,35 @@
 import sqlite3
 import json
+import os
+import time
 from datetime import datetime
 from dotenv import load_dotenv
 
 load_dotenv(override=True)
 
 DB = "accounts.db"
+# Fleet workers, the servers' writer threads and cron jobs all write accounts.db; a writer waits
+# this long for another one's lock before failing with "database is locked"
+BUSY_TIMEOUT_SECONDS = float(os.getenv("DB_BUSY_TIMEOUT_SECONDS", "30"))
+MAX_TRANSACTIONS_PAGE = 200  # also stated in the query_transactions tool docstring
 
 
-with sqlite3.connect(DB) as conn:
+# Bump SCHEMA_VERSION whenever the DDL in migrate() changes; databases behind it are upgraded
+# on their first connection (or explicitly with `uv run database.py`)
+SCHEMA_VERSION = 2
+_migrated = False
+
+
+def migrate(conn: sqlite3.Connection | None = None) -> int:
+    """Create or upgrade the schema if the database is behind SCHEMA_VERSION; returns the version."""
+    if conn is None:
+        with sqlite3.connect(DB, timeout=BUSY_TIMEOUT_SECONDS) as conn:
+            return migrate(conn)
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    if version >= SCHEMA_VERSION:
+        return version
+    # WAL lets the servers' reader threads run while the writer thread commits
+    conn.execute('PRAGMA journal_mode=WAL')
     cursor = conn.cursor()
     cursor.execute('CREATE TABLE IF NOT EXISTS accounts (name TEXT PRIMARY KEY, account TEXT)')
     cursor.execute('''
@@ -21,11 +42,77 @@ with sqlite3.connect(DB) as conn:
         )
     ''')
     cursor.execute('CREATE TABLE IF NOT EXISTS market (date TEXT PRIMARY KEY, data TEXT)')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS market_holidays (
+            date TEXT PRIMARY KEY,
+            status TEXT,
+            open TEXT,
+            close TEXT,
+            name TEXT
+        )
+    ''')
+    cursor.execute('CREATE TABLE IF NOT EXISTS market_calendar_refresh (id INTEGER PRIMARY KEY CHECK (id = 1), refreshed TEXT)')
+    cursor.execute('CREATE TABLE IF NOT EXISTS locks (name TEXT PRIMARY KEY, owner TEXT, expires REAL)')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS transactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT,
+            seq INTEGER,
+            symbol TEXT,
+            quantity INTEGER,
+            price REAL,
+            timestamp TEXT,
+            rationale TEXT,
+            UNIQUE (name, seq)
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_transactions_symbol ON transactions (name, symbol, seq)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_transactions_timestamp ON transactions (name, timestamp)')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS fleet_runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            run_id TEXT,
+            worker INTEGER,
+            name TEXT,
+            cycle INTEGER,
+            status TEXT,
+            seconds REAL,
+            error TEXT,
+            finished DATETIME
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_fleet_runs_run ON fleet_runs (run_id)')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS research_cache (
+            key TEXT PRIMARY KEY,
+            query TEXT,
+            result TEXT,
+            created REAL,
+            hits INTEGER DEFAULT 0
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_research_cache_created ON research_cache (created)')
+    # Version 2: transactions are only mirrored on save, so index the history of every account
+    # written before the table existed (or before it was kept in sync on save)
+    for name, account in cursor.execute('SELECT name, account FROM accounts').fetchall():
+        _sync_transactions(cursor, name, json.loads(account).get("transactions", []))
+    cursor.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
     conn.commit()
+    return SCHEMA_VERSION
+
+
+def connect() -> sqlite3.Connection:
+    """Open the database, migrating it on the first connection of the process."""
+    global _migrated
+    conn = sqlite3.connect(DB, timeout=BUSY_TIMEOUT_SECONDS)
+    if not _migrated:
+        migrate(conn)
+        _migrated = True
+    return conn
 
 def write_account(name, account_dict):
     json_data = json.dumps(account_dict)
-    with sqlite3.connect(DB) as conn:
+    with connect() as conn:
         cursor = conn.cursor()
         cursor.execute('''
             INSERT INTO accounts (name, account)
@@ -34,8 +121,19 @@ def write_account(name, account_dict):
         ''', (name.lower(), json_data))
         conn.commit()
 
+def create_account(name, account_dict):
+    """Insert a new account unless one with this name already exists."""
+    with connect() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT INTO accounts (name, account)
+            VALUES (?, ?)
+            ON CONFLICT(name) DO NOTHING
+        ''', (name.lower(), json.dumps(account_dict)))
+        conn.commit()
+
 def read_account(name):
-    with sqlite3.connect(DB) as conn:
+    with connect() as conn:
         cursor = conn.cursor()
         cursor.execute('SELECT account FROM accounts WHERE name = ?', (name.lower(),))
         row = cursor.fetchone()
@@ -52,7 +150,7 @@ def write_log(name: str, type: str, message: str):
     """
     now = datetime.now().isoformat()
     
-    with sqlite3.connect(DB) as conn:
+    with connect() as conn:
         cursor = conn.cursor()
         cursor.execute('''
             INSERT INTO logs (name, datetime, type, message)
@@ -71,7 +169,7 @@ def read_log(name: str, last_n=10):
     Returns:
         list: A list of tuples containing (datetime, type, message)
     """
-    with sqlite3.connect(DB) as conn:
+    with connect() as conn:
         cursor = conn.cursor()
         cursor.execute('''
             SELECT datetime, type, message FROM logs 
@@ -84,7 +182,7 @@ def read_log(name: str, last_n=10):
 
 def write_market(date: str, data: dict) -> None:
     data_json = json.dumps(data)
-    with sqlite3.connect(DB) as conn:
+    with connect() as conn:
         cursor = conn.cursor()
         cursor.execute('''
             INSERT INTO market (date, data)
@@ -94,8 +192,258 @@ def write_market(date: str, data: dict) -> None:
         conn.commit()
 
 def read_market(date: str) -> dict | None:
-    with sqlite3.connect(DB) as conn:
+    with connect() as conn:
         cursor = conn.cursor()
         cursor.execute('SELECT data FROM market WHERE date = ?', (date,))
         row = cursor.fetchone()
-        return json.loads(row[0]) if row else None
\ No newline at end of file
+        return json.loads(row[0]) if row else None
+
+def write_market_holidays(holidays: list[dict], refreshed: str) -> None:
+    """
+    Store upcoming market holidays and early closes.
+
+    Args:
+        holidays (list[dict]): Rows with date, status ("closed" | "early-close"), open, close and name
+        refreshed (str): The date the calendar was fetched, so it is refreshed at most once a day
+    """
+    with connect() as conn:
+        cursor = conn.cursor()
+        cursor.executemany('''
+            INSERT INTO market_holidays (date, status, open, close, name)
+            VALUES (:date, :status, :open, :close, :name)
+            ON CONFLICT(date) DO UPDATE SET status=excluded.status, open=excluded.open,
+                close=excluded.close, name=excluded.name
+        ''', holidays)
+        cursor.execute('INSERT OR REPLACE INTO market_calendar_refresh (id, refreshed) VALUES (1, ?)', (refreshed,))
+        conn.commit()
+
+def read_market_holidays() -> dict[str, dict]:
+    with connect() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT date, status, open, close, name FROM market_holidays')
+        return {
+            row[0]: {"date": row[0], "status": row[1], "open": row[2], "close": row[3], "name": row[4]}
+            for row in cursor.fetchall()
+        }
+
+def read_market_calendar_refreshed() -> str | None:
+    with connect() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT refreshed FROM market_calendar_refresh WHERE id = 1')
+        row = cursor.fetchone()
+        return row[0] if row else None
+
+
+def acquire_lock(name: str, owner: str, ttl_seconds: float) -> bool:
+    """
+    Take a named lease shared by every process using the database.
+
+    The lease is granted if nobody holds it or the previous holder's lease has expired.
+
+    Args:
+        name (str): The lock name
+        owner (str): Identifies the holder, so only it can release the lock
+        ttl_seconds (float): How long the lease lasts if it is never released
+    """
+    now = time.time()
+    with connect() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT INTO locks (name, owner, expires)
+            VALUES (?, ?, ?)
+            ON CONFLICT(name) DO UPDATE SET owner=excluded.owner, expires=excluded.expires
+            WHERE locks.expires < ?
+        ''', (name, owner, now + ttl_seconds, now))
+        conn.commit()
+        return cursor.rowcount == 1
+
+def release_lock(name: str, owner: str) -> None:
+    with connect() as conn:
+        cursor = conn.cursor()
+        cursor.execute('DELETE FROM locks WHERE name = ? AND owner = ?', (name, owner))
+        conn.commit()
+
+def _sync_transactions(cursor: sqlite3.Cursor, name: str, transactions: list[dict]) -> None:
+    name = name.lower()
+    cursor.execute('SELECT COUNT(*) FROM transactions WHERE name = ?', (name,))
+    stored = cursor.fetchone()[0]
+    if stored == len(transactions):
+        return
+    if stored > len(transactions):
+        cursor.execute('DELETE FROM transactions WHERE name = ?', (name,))
+        stored = 0
+    cursor.executemany('''
+        INSERT OR IGNORE INTO transactions (name, seq, symbol, quantity, price, timestamp, rationale)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', [
+        (name, seq, t["symbol"], t["quantity"], t["price"], t["timestamp"], t["rationale"])
+        for seq, t in enumerate(transactions[stored:], start=stored)
+    ])
+
+def sync_transactions(name: str, transactions: list[dict]) -> None:
+    """
+    Mirror an account's transaction list into the indexed transactions table.
+
+    Transactions are append-only, so only the ones past the stored count are inserted; a shorter
+    list (after a reset) replaces the stored history.
+
+    Args:
+        name (str): The account name
+        transactions (list[dict]): All transactions of the account, oldest first
+    """
+    with connect() as conn:
+        _sync_transactions(conn.cursor(), name, transactions)
+        conn.commit()
+
+def _transaction_filters(name: str, symbol: str | None, side: str | None, start: str | None, end: str | None) -> tuple[str, list]:
+    clauses, params = ['name = ?'], [name.lower()]
+    if symbol:
+        clauses.append('symbol = ?')
+        params.append(symbol)
+    if side == "buy":
+        clauses.append('quantity > 0')
+    elif side == "sell":
+        clauses.append('quantity < 0')
+    elif side:
+        raise ValueError(f"Unknown side {side!r}; use 'buy' or 'sell'")
+    if start:
+        clauses.append('timestamp >= ?')
+        params.append(start)
+    if end:
+        # A bare date includes the whole day
+        clauses.append('timestamp <= ?')
+        params.append(end if len(end) > 10 else end + " 23:59:59")
+    return " AND ".join(clauses), params
+
+def query_transactions(name: str, symbol: str | None = None, side: str | None = None, start: str | None = None,
+                       end: str | None = None, limit: int = 20, cursor: int | None = None) -> tuple[list[dict], int | None]:
+    """
+    Read one page of transactions, newest first.
+
+    Args:
+        name (str): The account name
+        symbol (str): Only this symbol
+        side (str): "buy" or "sell"
+        start (str), end (str): Inclusive "YYYY-MM-DD" or "YYYY-MM-DD HH:MM:SS" bounds
+        limit (int): Page size, clamped to 1..MAX_TRANSACTIONS_PAGE
+        cursor (int): The cursor returned with the previous page
+
+    Returns:
+        tuple: The transactions and the cursor of the next page (None on the last page)
+    """
+    # LIMIT 0 would drop the cursor row and a negative LIMIT means no limit in SQLite
+    limit = max(1, min(int(limit), MAX_TRANSACTIONS_PAGE))
+    where, params = _transaction_filters(name, symbol, side, start, end)
+    if cursor is not None:
+        where += ' AND seq < ?'
+        params.append(cursor)
+    with connect() as conn:
+        rows = conn.execute(f'''
+            SELECT seq, symbol, quantity, price, timestamp, rationale FROM transactions
+            WHERE {where}
+            ORDER BY seq DESC
+            LIMIT ?
+        ''', (*params, limit + 1)).fetchall()
+    page = [
+        {"symbol": row[1], "quantity": row[2], "price": row[3], "timestamp": row[4], "rationale": row[5]}
+        for row in rows[:limit]
+    ]
+    next_cursor = rows[limit - 1][0] if len(rows) > limit else None
+    return page, next_cursor
+
+def aggregate_transactions(name: str, symbol: str | None = None, side: str | None = None,
+                           start: str | None = None, end: str | None = None) -> dict[str, dict]:
+    """Per-symbol trade count, shares bought and sold, and notional traded for the filtered transactions."""
+    where, params = _transaction_filters(name, symbol, side, start, end)
+    with connect() as conn:
+        rows = conn.execute(f'''
+            SELECT symbol,
+                   COUNT(*),
+                   SUM(CASE WHEN quantity > 0 THEN quantity ELSE 0 END),
+                   SUM(CASE WHEN quantity < 0 THEN -quantity ELSE 0 END),
+                   SUM(ABS(quantity) * price),
+                   SUM(quantity * price)
+            FROM transactions
+            WHERE {where}
+            GROUP BY symbol
+            ORDER BY symbol
+        ''', params).fetchall()
+    return {
+        row[0]: {"trades": row[1], "bought": row[2], "sold": row[3], "notional": round(row[4], 2), "net_cash_out": round(row[5], 2)}
+        for row in rows
+    }
+
+def write_fleet_result(run_id: str, worker: int, name: str, cycle: int, status: str, seconds: float, error: str | None = None) -> None:
+    """
+    Record the outcome of one trader cycle run by a fleet worker.
+
+    Args:
+        run_id (str): Identifies the fleet run
+        worker (int): The worker process that ran the trader
+        name (str): The trader name
+        cycle (int): The cycle number within the run
+        status (str): "completed", "failed" or "skipped"
+        seconds (float): Wall time of the cycle
+        error (str): The error message of a failed cycle
+    """
+    with connect() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT INTO fleet_runs (run_id, worker, name, cycle, status, seconds, error, finished)
+            VALUES (?, ?, ?, ?, ?, ?, ?, datetime('now'))
+        ''', (run_id, worker, name.lower(), cycle, status, seconds, error))
+        conn.commit()
+
+def read_fleet_results(run_id: str) -> list[dict]:
+    with connect() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT worker, name, cycle, status, seconds, error FROM fleet_runs
+            WHERE run_id = ?
+            ORDER BY id
+        ''', (run_id,))
+        return [
+            {"worker": row[0], "name": row[1], "cycle": row[2], "status": row[3], "seconds": row[4], "error": row[5]}
+            for row in cursor.fetchall()
+        ]
+
+def read_research(key: str, max_age_seconds: float) -> str | None:
+    """Return the cached research for a key if it is younger than max_age_seconds, counting the hit."""
+    with connect() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            UPDATE research_cache SET hits = hits + 1
+            WHERE key = ? AND created >= ?
+            RETURNING result
+        ''', (key, time.time() - max_age_seconds))
+        row = cursor.fetchone()
+        conn.commit()
+        return row[0] if row else None
+
+def write_research(key: str, query: str, result: str, max_entries: int) -> None:
+    """Store research for a key, evicting the oldest entries beyond max_entries."""
+    with connect() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT INTO research_cache (key, query, result, created, hits)
+            VALUES (?, ?, ?, ?, 0)
+            ON CONFLICT(key) DO UPDATE SET query=excluded.query, result=excluded.result,
+                created=excluded.created, hits=0
+        ''', (key, query, result, time.time()))
+        cursor.execute('''
+            DELETE FROM research_cache WHERE key IN (
+                SELECT key FROM research_cache ORDER BY created DESC LIMIT -1 OFFSET ?
+            )
+        ''', (max_entries,))
+        conn.commit()
+
+def read_research_cache_stats() -> dict:
+    with connect() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT COUNT(*), COALESCE(SUM(hits), 0) FROM research_cache')
+        entries, hits = cursor.fetchone()
+        return {"entries": entries, "stored_hits": hits}
+
+
+if __name__ == "__main__":
+    print(f"{DB} is at schema version {migrate()}")
@@ -0,0 +1,121 @@
+"""Run a fleet of traders sharded across worker processes.
+
+Each worker process owns one event loop and one set of MCP servers shared by the traders in its
+shard, so pydantic validation, JSON encoding and prompt building of different shards run on
+different cores. Workers report every cycle to the fleet_runs table, and the parent process
+aggregates the results and errors once they are done.
+
+Usage:
+    uv run fleet.py Warren George Ray Cathie:gpt-4.1-mini --workers 4 --cycles 2 --interval 60
+"""
+import argparse
+import asyncio
+import importlib
+import multiprocessing
+import os
+import time
+import uuid
+from collections import Counter
+from contextlib import AsyncExitStack
+from typing import Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+from database import read_fleet_results, write_fleet_result
+
+load_dotenv(override=True)
+
+FLEET_WORKERS = int(os.getenv("FLEET_WORKERS", "0")) or os.cpu_count() or 1
+DEFAULT_MODEL = "gpt-4o-mini"
+
+TraderSpec = Tuple[str, str]
+
+
+def parse_spec(value: str) -> TraderSpec:
+    name, _, model_name = value.partition(":")
+    return name, model_name or DEFAULT_MODEL
+
+
+def shard(specs: List[TraderSpec], workers: int) -> List[List[TraderSpec]]:
+    """Deal the traders round-robin over at most `workers` non-empty shards."""
+    shards = [specs[i::workers] for i in range(min(workers, len(specs)))]
+    return [s for s in shards if s]
+
+
+async def run_shard(run_id: str, worker: int, specs: List[TraderSpec], cycles: int, interval: float) -> None:
+    from traders import Trader, open_mcp_servers
+
+    fleet = [Trader(name, model_name=model_name) for name, model_name in specs]
+
+    async def run_one(trader: Trader, cycle: int, mcp_servers) -> None:
+        start = time.perf_counter()
+        try:
+            status = await trader.run(mcp_servers)
+        except Exception as e:
+            status, trader.last_error = "failed", str(e)
+        write_fleet_result(run_id, worker, trader.name, cycle, status, time.perf_counter() - start, trader.last_error)
+
+    async with AsyncExitStack() as stack:
+        mcp_servers = await open_mcp_servers(stack, f"fleet-{worker}")
+        for cycle in range(cycles):
+            await asyncio.gather(*(run_one(trader, cycle, mcp_servers) for trader in fleet))
+            if cycle < cycles - 1:
+                await asyncio.sleep(interval)
+
+
+def worker_main(run_id: str, worker: int, specs: List[TraderSpec], cycles: int, interval: float, setup: Optional[str]) -> None:
+    if setup:
+        # "module:function" called in each worker before the traders start, e.g. to install offline fakes
+        module, _, function = setup.partition(":")
+        getattr(importlib.import_module(module), function)()
+    asyncio.run(run_shard(run_id, worker, specs, cycles, interval))
+
+
+def run_fleet(specs: List[TraderSpec], workers: int = FLEET_WORKERS, cycles: int = 1, interval: float = 0.0, setup: Optional[str] = None) -> Dict:
+    """Run the fleet to completion and return a summary of every worker's results."""
+    run_id = uuid.uuid4().hex
+    context = multiprocessing.get_context("spawn")
+    shards = shard(specs, workers)
+    processes = [
+        context.Process(target=worker_main, args=(run_id, worker, specs_, cycles, interval, setup), name=f"fleet-{worker}")
+        for worker, specs_ in enumerate(shards)
+    ]
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    wall = time.perf_counter() - start
+
+    results = read_fleet_results(run_id)
+    crashed = {worker: process.exitcode for worker, process in enumerate(processes) if process.exitcode}
+    statuses = Counter(result["status"] for result in results)
+    return {
+        "run_id": run_id,
+        "workers": len(shards),
+        "traders": len(specs),
+        "cycles": cycles,
+        "wall_seconds": round(wall, 3),
+        "runs_per_second": round(statuses["completed"] / wall, 3) if wall else 0.0,
+        "statuses": dict(statuses),
+        "errors": [r for r in results if r["status"] == "failed"],
+        "crashed_workers": crashed,
+        "missing": len(specs) * cycles - len(results),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run traders sharded across worker processes")
+    parser.add_argument("traders", nargs="+", type=parse_spec, help="NAME or NAME:MODEL")
+    parser.add_argument("--workers", type=int, default=FLEET_WORKERS)
+    parser.add_argument("--cycles", type=int, default=1)
+    parser.add_argument("--interval", type=float, default=0.0, help="seconds between cycles")
+    parser.add_argument("--setup", help="module:function to call in each worker before it starts")
+    cli = parser.parse_args()
+    summary = run_fleet(cli.traders, cli.workers, cli.cycles, cli.interval, cli.setup)
+    print(f"{summary['traders']} traders x {summary['cycles']} cycles on {summary['workers']} workers in {summary['wall_seconds']}s "
+          f"({summary['runs_per_second']} runs/s): {summary['statuses']}")
+    for error in summary["errors"]:
+        print(f"  worker {error['worker']} {error['name']} cycle {error['cycle']}: {error['error']}")
+    for worker, code in summary["crashed_workers"].items():
+        print(f"  worker {worker} exited with code {code}")
+    if summary["missing"]:
+        print(f"  {summary['missing']} trader cycles did not report a result")
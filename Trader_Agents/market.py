@@ -1,9 +1,13 @@
-from polygon import RESTClient
 from dotenv import load_dotenv
 import os
-from datetime import datetime
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
 import random
-from database import write_market, read_market
+from database import write_market, read_market, acquire_lock, release_lock
+from market_calendar import is_session_open
 from functools import lru_cache
 from datetime import timezone
 
@@ -14,16 +18,23 @@ polygon_plan = os.getenv("POLYGON_PLAN")
 
 is_paid_polygon = polygon_plan == "paid"
 is_realtime_polygon = polygon_plan == "realtime"
+# "simulated" serves seeded GBM prices from market_sim.py with no network access
+is_simulated_market = polygon_plan == "simulated"
+
+MARKET_LOCK_TTL_SECONDS = 120
+MARKET_LOCK_POLL_SECONDS = 0.5
+PREFETCH_AFTER_MIDNIGHT_SECONDS = 60
 
 
 def is_market_open() -> bool:
-    client = RESTClient(polygon_api_key)
-    market_status = client.get_market_status()
-    return market_status.market == "open"
+    # Answered from the cached calendar instead of a get_market_status request per call
+    return is_session_open(session="regular")
 
 
 def get_all_share_prices_polygon_eod() -> dict[str, float]:
     """With much thanks to student Reema R. for fixing the timezone issue with this!"""
+    from polygon import RESTClient
+
     client = RESTClient(polygon_api_key)
 
     probe = client.get_previous_close_agg("SPY")[0]
@@ -33,13 +44,73 @@ def get_all_share_prices_polygon_eod() -> dict[str, float]:
     return {result.ticker: result.close for result in results}
 
 
+def load_market_for_date(today: str) -> dict[str, float]:
+    """Return the EOD prices stored for `today`, downloading them if needed.
+
+    Only one process downloads a given date: the others wait on the shared lock and then read
+    what the lock holder wrote to the market table.
+    """
+    lock = f"market:{today}"
+    owner = f"{os.getpid()}:{threading.get_ident()}:{uuid.uuid4().hex}"
+    deadline = time.monotonic() + MARKET_LOCK_TTL_SECONDS * 2
+    while True:
+        market_data = read_market(today)
+        if market_data:
+            return market_data
+        if acquire_lock(lock, owner, MARKET_LOCK_TTL_SECONDS):
+            try:
+                market_data = read_market(today)
+                if not market_data:
+                    market_data = get_all_share_prices_polygon_eod()
+                    write_market(today, market_data)
+                return market_data
+            finally:
+                release_lock(lock, owner)
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Timed out waiting for market data for {today}")
+        time.sleep(MARKET_LOCK_POLL_SECONDS)
+
+
 @lru_cache(maxsize=2)
 def get_market_for_prior_date(today):
-    market_data = read_market(today)
-    if not market_data:
-        market_data = get_all_share_prices_polygon_eod()
-        write_market(today, market_data)
-    return market_data
+    return load_market_for_date(today)
+
+
+def prefetch_market_data() -> bool:
+    """Populate the market table for today ahead of the first trader run; True if data is ready."""
+    if not polygon_api_key or is_paid_polygon or is_realtime_polygon or is_simulated_market:
+        return False
+    today = datetime.now().date().strftime("%Y-%m-%d")
+    get_market_for_prior_date(today)
+    return True
+
+
+def _prefetch_forever() -> None:
+    while True:
+        try:
+            prefetch_market_data()
+        except Exception as e:
+            print(f"Was not able to prefetch market data due to {e}", file=sys.stderr)
+        now = datetime.now()
+        tomorrow = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+        time.sleep((tomorrow - now).total_seconds() + PREFETCH_AFTER_MIDNIGHT_SECONDS)
+
+
+_prefetch_thread: threading.Thread | None = None
+
+
+def start_prefetch_thread() -> threading.Thread | None:
+    """Warm up today's EOD prices now, then again just after every midnight, on a daemon thread.
+
+    Only one thread runs per process, however many times the server is started in it.
+    """
+    global _prefetch_thread
+    if not polygon_api_key or is_paid_polygon or is_realtime_polygon or is_simulated_market:
+        return None
+    if _prefetch_thread is None or not _prefetch_thread.is_alive():
+        _prefetch_thread = threading.Thread(target=_prefetch_forever, name="market-prefetch", daemon=True)
+        _prefetch_thread.start()
+    return _prefetch_thread
 
 
 def get_share_price_polygon_eod(symbol) -> float:
@@ -49,6 +120,8 @@ def get_share_price_polygon_eod(symbol) -> float:
 
 
 def get_share_price_polygon_min(symbol) -> float:
+    from polygon import RESTClient
+
     client = RESTClient(polygon_api_key)
     result = client.get_snapshot_ticker("stocks", symbol)
     return result.min.close or result.prev_day.close
@@ -62,9 +135,19 @@ def get_share_price_polygon(symbol) -> float:
 
 
 def get_share_price(symbol) -> float:
+    if is_simulated_market:
+        # Imported on first use: numpy is only needed for the simulated feed
+        from market_sim import get_simulated_market
+
+        return get_simulated_market().price(symbol)
     if polygon_api_key:
         try:
             return get_share_price_polygon(symbol)
         except Exception as e:
             print(f"Was not able to use the polygon API due to {e}; using a random number")
     return float(random.randint(1, 100))
+
+
+if __name__ == "__main__":
+    # Run from cron (or before starting the traders) to warm up today's EOD prices
+    print("Prefetched market data" if prefetch_market_data() else "Nothing to prefetch for this Polygon plan")
@@ -0,0 +1,87 @@
+import os
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+from dotenv import load_dotenv
+from database import write_market_holidays, read_market_holidays, read_market_calendar_refreshed
+
+load_dotenv(override=True)
+
+polygon_api_key = os.getenv("POLYGON_API_KEY")
+
+MARKET_TZ = ZoneInfo("America/New_York")
+SESSIONS = {
+    "regular": (time(9, 30), time(16, 0)),
+    "extended": (time(4, 0), time(20, 0)),
+    "always": (time(0, 0), time.max),
+}
+# TRADING_SESSION: which hours count as "open" for the trader run gate
+trading_session = os.getenv("TRADING_SESSION", "regular")
+LOOKAHEAD_DAYS = 10
+
+
+def fetch_polygon_holidays() -> list[dict]:
+    from polygon import RESTClient
+
+    client = RESTClient(polygon_api_key)
+    return [
+        {"date": h.date, "status": h.status, "open": h.open, "close": h.close, "name": h.name}
+        for h in client.get_market_holidays()
+        if h.exchange == "NYSE"
+    ]
+
+
+@lru_cache(maxsize=2)
+def get_holidays(today: str) -> dict[str, dict]:
+    """Upcoming holidays and early closes, refreshed from Polygon at most once per day.
+
+    The calendar lives in the market_holidays table, so it keeps working offline with
+    whatever was last fetched.
+    """
+    if polygon_api_key and read_market_calendar_refreshed() != today:
+        try:
+            write_market_holidays(fetch_polygon_holidays(), today)
+        except Exception as e:
+            print(f"Was not able to refresh the market calendar due to {e}; using the stored calendar")
+    return read_market_holidays()
+
+
+def now_in_market_tz() -> datetime:
+    return datetime.now(MARKET_TZ)
+
+
+def session_for(day: date, session: str | None = None) -> tuple[datetime, datetime] | None:
+    """Return the (open, close) of the given day's session, or None when the market is closed."""
+    session = session or trading_session
+    start, end = SESSIONS[session]
+    open_at = datetime.combine(day, start, MARKET_TZ)
+    close_at = datetime.combine(day, end, MARKET_TZ)
+    if session == "always":
+        return open_at, close_at
+    if day.weekday() >= 5:
+        return None
+    holiday = get_holidays(now_in_market_tz().date().isoformat()).get(day.isoformat())
+    if holiday:
+        if holiday["status"] == "closed":
+            return None
+        if holiday["close"]:
+            close_at = min(close_at, datetime.fromisoformat(holiday["close"].replace("Z", "+00:00")).astimezone(MARKET_TZ))
+    return open_at, close_at
+
+
+def is_session_open(now: datetime | None = None, session: str | None = None) -> bool:
+    now = now or now_in_market_tz()
+    hours = session_for(now.date(), session)
+    return hours is not None and hours[0] <= now < hours[1]
+
+
+def next_session_open(now: datetime | None = None, session: str | None = None) -> datetime | None:
+    """The next time the session opens (now, if it is already open)."""
+    now = now or now_in_market_tz()
+    if is_session_open(now, session):
+        return now
+    for offset in range(LOOKAHEAD_DAYS):
+        hours = session_for(now.date() + timedelta(days=offset), session)
+        if hours and hours[0] > now:
+            return hours[0]
+    return None
@@ -1,7 +1,25 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
 from mcp.server.fastmcp import FastMCP
-from market import get_share_price
+from metrics import instrument, registry
+from market import get_share_price, get_market_for_prior_date, start_prefetch_thread, is_simulated_market
 
-mcp = FastMCP("market_server")
+
+@asynccontextmanager
+async def lifespan(server: FastMCP) -> AsyncIterator[None]:
+    # Download today's EOD prices in the background so the first lookup does not stall a trade.
+    # Started when the server runs, not on import, so importing this module has no side effects.
+    start_prefetch_thread()
+    yield
+
+
+mcp = instrument(FastMCP("market_server", lifespan=lifespan))
+
+eod_cache = registry.gauge("market_eod_cache_lookups", "In-process EOD price cache lookups by result")
+eod_cache.set_function(lambda: get_market_for_prior_date.cache_info().hits, server="market_server", result="hit")
+eod_cache.set_function(lambda: get_market_for_prior_date.cache_info().misses, server="market_server", result="miss")
 
 @mcp.tool()
 async def lookup_share_price(symbol: str) -> float:
@@ -10,7 +28,36 @@ async def lookup_share_price(symbol: str) -> float:
     Args:
         symbol: the symbol of the stock
     """
-    return get_share_price(symbol)
+    # An EOD cache miss may download prices or wait for another process's download, so it
+    # runs on the executor rather than blocking the event loop
+    return await asyncio.get_running_loop().run_in_executor(None, get_share_price, symbol)
+
+if is_simulated_market:
+
+    @mcp.tool()
+    async def lookup_share_prices(symbols: list[str]) -> dict[str, float]:
+        """This tool provides the current prices of several stock symbols at once.
+
+        Args:
+            symbols: the symbols of the stocks
+        """
+        from market_sim import get_simulated_market
+
+        return get_simulated_market().snapshot(symbols)
+
+    @mcp.tool()
+    async def lookup_price_history(symbol: str, days: int = 30, points: int = 30) -> list[tuple[str, float]]:
+        """This tool provides evenly spaced (time, price) pairs for the given stock symbol over the last few days.
+
+        Args:
+            symbol: the symbol of the stock
+            days: how many days to look back
+            points: how many prices to return
+        """
+        from market_sim import get_simulated_market
+
+        now = time.time()
+        return get_simulated_market().history(symbol, now - days * 86400, now, points)
 
 if __name__ == "__main__":
     mcp.run(transport='stdio')
\ No newline at end of file
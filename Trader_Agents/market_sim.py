@@ -0,0 +1,157 @@
+"""Seeded, time-consistent simulated market feed (POLYGON_PLAN=simulated).
+
+Prices follow correlated geometric Brownian motion: every slot in the universe loads on a market
+factor and a sector factor plus its own noise. Log returns are generated in chunks of steps with a
+generator seeded by (seed, chunk), so any process with the same settings sees the same price for the
+same symbol at the same time, and a point in history can be rebuilt without replaying everything
+after it. Every ticker of the universe has its own slot: the named tickers come first, then
+generated SIM0001, SIM0002, ... tickers fill it up to SIM_SYMBOLS. Other symbols are rejected.
+"""
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv(override=True)
+
+SIM_SEED = int(os.getenv("SIM_SEED", "42"))
+SIM_SYMBOLS = int(os.getenv("SIM_SYMBOLS", "2000"))
+# Comma-separated tickers replacing DEFAULT_TICKERS as the named part of the universe
+SIM_TICKERS = os.getenv("SIM_TICKERS")
+SIM_STEP_SECONDS = int(os.getenv("SIM_STEP_SECONDS", "3600"))
+SIM_EPOCH = os.getenv("SIM_EPOCH", "2025-01-01")
+SECTORS = 11
+CHUNK_STEPS = 256
+SECONDS_PER_YEAR = 365 * 24 * 3600
+DEFAULT_TICKERS = (
+    "SPY QQQ DIA IWM AAPL MSFT NVDA AMZN GOOG GOOGL META TSLA BRK.B AVGO LLY JPM V UNH XOM MA JNJ PG HD "
+    "COST ABBV MRK WMT NFLX CRM BAC CVX KO PEP AMD ADBE TMO ORCL LIN MCD CSCO ACN ABT WFC DHR INTC DIS "
+    "QCOM TXN VZ INTU CMCSA PFE AMGN IBM NOW PM CAT GE UNP SPGI NEE RTX LOW HON AMAT BKNG GS T UBER ISRG "
+    "PLD SBUX BLK MS ELV MDT DE AXP SYK TJX LMT GILD C MDLZ ADI VRTX MMC CVS PYPL SCHW CB REGN BA MU LRCX "
+    "ZTS PANW SNOW SHOP PLTR COIN SQ ABNB F GM NKE"
+).split()
+
+
+def universe(tickers: Optional[Iterable[str]] = None, size: int = SIM_SYMBOLS) -> List[str]:
+    """The named tickers (deduplicated, upper case), then generated ones up to `size` slots."""
+    if tickers is None:
+        tickers = SIM_TICKERS.split(",") if SIM_TICKERS else DEFAULT_TICKERS
+    named = list(dict.fromkeys(ticker.strip().upper() for ticker in tickers if ticker.strip()))
+    return named + [f"SIM{i:04d}" for i in range(1, size - len(named) + 1)]
+
+
+def _timestamp(at: Optional[datetime | float]) -> float:
+    if at is None:
+        return time.time()
+    if isinstance(at, datetime):
+        return (at if at.tzinfo else at.replace(tzinfo=timezone.utc)).timestamp()
+    return float(at)
+
+
+class SimulatedMarket:
+    def __init__(self, seed: int = SIM_SEED, symbols: int = SIM_SYMBOLS, step_seconds: int = SIM_STEP_SECONDS, epoch: str = SIM_EPOCH,
+                 tickers: Optional[Iterable[str]] = None):
+        self.seed = seed
+        self.tickers = universe(tickers, symbols)
+        self.index = {ticker: slot for slot, ticker in enumerate(self.tickers)}
+        self.size = symbols = len(self.tickers)
+        self.step_seconds = step_seconds
+        self.epoch = datetime.fromisoformat(epoch).replace(tzinfo=timezone.utc).timestamp()
+
+        params = np.random.default_rng([seed, 2**32 - 1])
+        self.initial = np.exp(params.normal(np.log(80), 0.9, symbols))
+        volatility = params.uniform(0.15, 0.6, symbols)
+        drift = params.uniform(-0.05, 0.15, symbols)
+        self.sector = params.integers(0, SECTORS, symbols)
+        self.market_loading = params.uniform(0.3, 0.7, symbols)
+        self.sector_loading = params.uniform(0.1, 0.4, symbols)
+        self.idio_loading = np.sqrt(1 - self.market_loading**2 - self.sector_loading**2)
+
+        dt = step_seconds / SECONDS_PER_YEAR
+        self.step_drift = (drift - volatility**2 / 2) * dt
+        self.step_vol = volatility * np.sqrt(dt)
+        # offsets[c] holds the cumulative log return of every slot before chunk c; the lock keeps
+        # concurrent lookups (the server's executor threads) from appending the same chunk twice
+        self.offsets: List[np.ndarray] = [np.zeros(symbols)]
+        self.lock = threading.Lock()
+        self._chunk = lru_cache(maxsize=8)(self._generate_chunk)
+
+    def _generate_chunk(self, chunk: int) -> np.ndarray:
+        """Cumulative log returns within one chunk: row j is the total after j + 1 steps."""
+        rng = np.random.default_rng([self.seed, chunk])
+        market = rng.standard_normal((CHUNK_STEPS, 1))
+        sectors = rng.standard_normal((CHUNK_STEPS, SECTORS))
+        noise = rng.standard_normal((CHUNK_STEPS, self.size))
+        shocks = self.market_loading * market + self.sector_loading * sectors[:, self.sector] + self.idio_loading * noise
+        return np.cumsum(self.step_drift + self.step_vol * shocks, axis=0)
+
+    def _offset(self, chunk: int) -> np.ndarray:
+        with self.lock:
+            while len(self.offsets) <= chunk:
+                self.offsets.append(self.offsets[-1] + self._chunk(len(self.offsets) - 1)[-1])
+            return self.offsets[chunk]
+
+    def step_at(self, at: Optional[datetime | float] = None) -> int:
+        return max(0, int((_timestamp(at) - self.epoch) // self.step_seconds))
+
+    def log_returns(self, step: int) -> np.ndarray:
+        """Cumulative log return of every slot from the epoch to the given step."""
+        chunk, row = divmod(step, CHUNK_STEPS)
+        offset = self._offset(chunk)
+        return offset if row == 0 else offset + self._chunk(chunk)[row - 1]
+
+    def slots(self, symbols: Iterable[str]) -> np.ndarray:
+        """Map ticker symbols to their universe slots; raises ValueError for symbols outside the universe."""
+        symbols = list(symbols)
+        unknown = [symbol for symbol in symbols if symbol.upper() not in self.index]
+        if unknown:
+            raise ValueError(f"Unrecognized symbol {', '.join(unknown)}")
+        return np.array([self.index[symbol.upper()] for symbol in symbols], dtype=np.int64)
+
+    def snapshot(self, symbols: List[str], at: Optional[datetime | float] = None) -> Dict[str, float]:
+        indexes = self.slots(symbols)
+        prices = self.initial[indexes] * np.exp(self.log_returns(self.step_at(at))[indexes])
+        return {symbol: round(float(price), 2) for symbol, price in zip(symbols, prices)}
+
+    def price(self, symbol: str, at: Optional[datetime | float] = None) -> float:
+        return self.snapshot([symbol], at)[symbol]
+
+    def history(self, symbol: str, start: datetime | float, end: Optional[datetime | float] = None, points: int = 100) -> List[Tuple[str, float]]:
+        """Up to `points` evenly spaced (UTC ISO time, price) pairs between start and end."""
+        first, last = self.step_at(start), self.step_at(end)
+        steps = np.unique(np.linspace(first, last, min(points, last - first + 1)).astype(np.int64))
+        (index,) = self.slots([symbol])
+        base = self.initial[index]
+        return [
+            (
+                datetime.fromtimestamp(self.epoch + int(step) * self.step_seconds, tz=timezone.utc).isoformat(),
+                round(float(base * np.exp(self.log_returns(int(step))[index])), 2),
+            )
+            for step in steps
+        ]
+
+
+@lru_cache(maxsize=1)
+def get_simulated_market() -> SimulatedMarket:
+    return SimulatedMarket()
+
+
+if __name__ == "__main__":
+    market = get_simulated_market()
+    start = time.perf_counter()
+    market.price("AAPL")
+    print(f"Warm-up to {datetime.now(timezone.utc):%Y-%m-%d %H:%M} UTC: {time.perf_counter() - start:.2f}s")
+    symbols = market.tickers[:1000]
+    start = time.perf_counter()
+    for symbol in symbols:
+        market.price(symbol)
+    elapsed = time.perf_counter() - start
+    print(f"Single-symbol lookups: {len(symbols) / elapsed:,.0f}/s")
+    start = time.perf_counter()
+    market.snapshot(symbols)
+    print(f"1000-symbol snapshot: {(time.perf_counter() - start) * 1000:.1f}ms")
+    print("AAPL, last 5 days:", market.history("AAPL", time.time() - 5 * 86400, points=6))
@@ -1,6 +1,4 @@
 # Facade module for MCP server parameters
-from mcp_params import trader_mcp_server_params, researcher_mcp_server_params
-
-__all__ = ["trader_mcp_server_params", "researcher_mcp_server_params"]
-
+from mcp_params import trader_mcp_server_params, researcher_mcp_server_params, mcp_transport
 
+__all__ = ["trader_mcp_server_params", "researcher_mcp_server_params", "mcp_transport"]
@@ -0,0 +1,83 @@
+from contextlib import asynccontextmanager
+from importlib import import_module
+from typing import Any, AsyncIterator, Dict
+import anyio
+from mcp import ClientSession
+from mcp.server.fastmcp import FastMCP
+from mcp.shared.memory import create_client_server_memory_streams
+from agents.mcp import MCPServerStdio
+from agents.mcp.server import _MCPServerWithClientSession
+
+
+def load_server(module: str) -> FastMCP:
+    """Import one of the local server modules (e.g. "accounts_server") and return its FastMCP app."""
+    return import_module(module).mcp
+
+
+@asynccontextmanager
+async def in_process_streams(server: FastMCP) -> AsyncIterator[tuple]:
+    """Run a FastMCP server on a background task and yield the client side of in-memory streams.
+
+    The server speaks the same MCP protocol as over stdio, but messages are passed as objects
+    through anyio memory streams instead of being JSON-encoded through a subprocess pipe.
+    """
+    lowlevel = server._mcp_server
+    async with create_client_server_memory_streams() as (client_streams, server_streams):
+        server_read, server_write = server_streams
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(
+                lambda: lowlevel.run(
+                    server_read,
+                    server_write,
+                    lowlevel.create_initialization_options(),
+                )
+            )
+            try:
+                yield client_streams
+            finally:
+                tg.cancel_scope.cancel()
+
+
+@asynccontextmanager
+async def in_process_session(module: str) -> AsyncIterator[ClientSession]:
+    """Open an initialized ClientSession against a local server module hosted in this process."""
+    async with in_process_streams(load_server(module)) as (read, write):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            yield session
+
+
+class MCPServerInProcess(_MCPServerWithClientSession):
+    """Agents SDK MCP server that hosts a local FastMCP app inside the current process.
+
+    Drop-in replacement for MCPServerStdio for the servers in this folder: agents still see a
+    regular MCP server, but there is no `uv run` start-up and no pipe I/O per tool call.
+    """
+
+    def __init__(
+        self,
+        params: Dict[str, Any],
+        cache_tools_list: bool = False,
+        name: str | None = None,
+        client_session_timeout_seconds: float | None = 5,
+    ):
+        super().__init__(cache_tools_list, client_session_timeout_seconds)
+        self.module: str = params["module"]
+        self._name = name or f"inprocess: {self.module}"
+
+    def create_streams(self):
+        return in_process_streams(load_server(self.module))
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+
+def create_mcp_server(params: Dict[str, Any], **kwargs: Any):
+    """Build the right MCP server for a params dict from mcp_params.
+
+    Params with a "module" key are hosted in-process, everything else is spawned over stdio.
+    """
+    if "module" in params:
+        return MCPServerInProcess(params, **kwargs)
+    return MCPServerStdio(params, **kwargs)
@@ -5,6 +5,18 @@ from market import is_paid_polygon, is_realtime_polygon
 load_dotenv(override=True)
 polygon_api_key = os.getenv("POLYGON_API_KEY")
 
+# How the local Python servers are hosted: "stdio" spawns each one with `uv run`,
+# "inprocess" runs the FastMCP apps inside the trader's own process over memory streams
+
+mcp_transport = os.getenv("MCP_TRANSPORT", "stdio")
+
+
+def local_server(script: str) -> dict:
+    if mcp_transport == "inprocess":
+        return {"module": script.removesuffix(".py")}
+    return {"command": "uv", "args": ["run", script]}
+
+
 # The MCP server for the Trader to read Market Data
 
 if is_paid_polygon or is_realtime_polygon:
@@ -14,14 +26,14 @@ if is_paid_polygon or is_realtime_polygon:
         "env": {"POLYGON_API_KEY": polygon_api_key},
     }
 else:
-    market_mcp = {"command": "uv", "args": ["run", "market_server.py"]}
+    market_mcp = local_server("market_server.py")
 
 
 # The full set of MCP servers for the trader: Accounts, Push Notification and the Market
 
 trader_mcp_server_params = [
-    {"command": "uv", "args": ["run", "accounts_server.py"]},
-    {"command": "uv", "args": ["run", "push_server.py"]},
+    local_server("accounts_server.py"),
+    local_server("push_server.py"),
     market_mcp,
 ]
 
@@ -30,7 +42,7 @@ trader_mcp_server_params = [
 
 def researcher_mcp_server_params(name: str):
     return [
-        {"command": "uv", "args": ["run", "fetch_server.py"]},
-        {"command": "uv", "args": ["run", "search_server.py"]},
-        {"command": "uv", "args": ["run", "memory_server.py"]},
+        local_server("fetch_server.py"),
+        local_server("search_server.py"),
+        local_server("memory_server.py"),
     ]
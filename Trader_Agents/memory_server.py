@@ -1,10 +1,14 @@
 from mcp.server.fastmcp import FastMCP
+from metrics import instrument
+from async_db import db
 from typing import Optional, List, Dict, Any
 import sqlite3
 from contextlib import closing
+from functools import lru_cache
 import os
 
 
+@lru_cache(maxsize=None)
 def _ensure_db(path: str):
     os.makedirs(os.path.dirname(path), exist_ok=True)
     with closing(sqlite3.connect(path)) as conn:
@@ -49,28 +53,25 @@ class MemoryStore:
             ]
 
 
-mcp = FastMCP("memory_server")
+mcp = instrument(FastMCP("memory_server"))
 
 
 @mcp.tool()
 async def memory_put(namespace: str, key: str, value: str, db_path: str = "./memory/local.db") -> int:
     """Store a value by namespace and key, returns entry id."""
-    store = MemoryStore(db_path)
-    return store.put(namespace, key, value)
+    return await db.write(lambda: MemoryStore(db_path).put(namespace, key, value))
 
 
 @mcp.tool()
 async def memory_get(namespace: str, key: str, db_path: str = "./memory/local.db") -> Optional[str]:
     """Get a value by namespace and key."""
-    store = MemoryStore(db_path)
-    return store.get(namespace, key)
+    return await db.read(lambda: MemoryStore(db_path).get(namespace, key))
 
 
 @mcp.tool()
 async def memory_list(namespace: str, db_path: str = "./memory/local.db") -> List[Dict[str, Any]]:
     """List values in a namespace (latest first)."""
-    store = MemoryStore(db_path)
-    return store.list(namespace)
+    return await db.read(lambda: MemoryStore(db_path).list(namespace))
 
 
 if __name__ == "__main__":
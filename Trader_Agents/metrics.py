@@ -0,0 +1,280 @@
+import atexit
+import functools
+import inspect
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+from mcp.server.fastmcp import FastMCP
+
+load_dotenv(override=True)
+
+# When set, every instrumented server writes its metrics to METRICS_DIR/<server>-<pid>.prom every
+# METRICS_INTERVAL_SECONDS while it runs (from its first tool call) and once more on exit, so
+# metrics_cli.py can aggregate running and short-lived stdio servers without connecting to them
+METRICS_DIR = os.getenv("METRICS_DIR")
+METRICS_INTERVAL_SECONDS = float(os.getenv("METRICS_INTERVAL_SECONDS", "5"))
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, str]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self.lock = threading.Lock()
+
+    def samples(self) -> List[Tuple[str, Labels, Optional[Tuple[str, str]], float]]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str):
+        super().__init__(name, help)
+        self.values: Dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = _labels(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+    def samples(self):
+        with self.lock:
+            return [(self.name, key, None, value) for key, value in self.values.items()]
+
+
+class Gauge(Metric):
+    """A value that goes up and down; `set_function` makes it read its value at scrape time."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str):
+        super().__init__(name, help)
+        self.values: Dict[Labels, float] = {}
+        self.functions: Dict[Labels, Callable[[], float]] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        with self.lock:
+            self.values[_labels(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = _labels(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set_function(self, function: Callable[[], float], **labels: str) -> None:
+        with self.lock:
+            self.functions[_labels(labels)] = function
+
+    def samples(self):
+        with self.lock:
+            values = dict(self.values)
+            functions = dict(self.functions)
+        values.update({key: float(function()) for key, function in functions.items()})
+        return [(self.name, key, None, value) for key, value in values.items()]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help)
+        self.buckets = tuple(sorted(buckets))
+        self.series: Dict[Labels, List[float]] = {}  # per-bucket counts, then +Inf count, then sum
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = _labels(labels)
+        with self.lock:
+            series = self.series.setdefault(key, [0.0] * (len(self.buckets) + 2))
+            series[bisect_left(self.buckets, value)] += 1
+            series[-1] += value
+
+    def samples(self):
+        samples = []
+        with self.lock:
+            for key, series in self.series.items():
+                cumulative = 0.0
+                for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                    cumulative += count
+                    samples.append((f"{self.name}_bucket", key, ("le", _format_value(bound)), cumulative))
+                samples.append((f"{self.name}_count", key, None, cumulative))
+                samples.append((f"{self.name}_sum", key, None, series[-1]))
+        return samples
+
+
+class MetricsRegistry:
+    """Process-wide set of metrics, rendered in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+        self.lock = threading.Lock()
+
+    def _get(self, cls, name: str, help: str, **kwargs) -> Metric:
+        with self.lock:
+            if name not in self.metrics:
+                self.metrics[name] = cls(name, help, **kwargs)
+            metric = self.metrics[name]
+        if not isinstance(metric, cls):
+            raise ValueError(f"Metric {name} is already registered as a {metric.kind}")
+        return metric
+
+    def counter(self, name: str, help: str) -> Counter:
+        return self._get(Counter, name, help)
+
+    def gauge(self, name: str, help: str) -> Gauge:
+        return self._get(Gauge, name, help)
+
+    def histogram(self, name: str, help: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help, buckets=buckets)
+
+    def render(self, server: Optional[str] = None) -> str:
+        """Render every metric, or only the series labelled with the given server."""
+        lines = []
+        for metric in list(self.metrics.values()):
+            samples = [s for s in metric.samples() if server is None or ("server", server) in s[1]]
+            if not samples:
+                continue
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, extra, value in samples:
+                lines.append(f"{name}{_format_labels(labels, extra)} {_format_value(value)}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+
+registry = MetricsRegistry()
+
+tool_calls = registry.counter("mcp_tool_calls_total", "MCP tool calls")
+tool_errors = registry.counter("mcp_tool_errors_total", "MCP tool calls that raised")
+tool_in_flight = registry.gauge("mcp_tool_in_flight", "MCP tool calls currently running")
+tool_latency = registry.histogram("mcp_tool_duration_seconds", "MCP tool call latency")
+
+
+def metered(server: str, tool: Optional[str] = None) -> Callable[[Callable], Callable]:
+    """Decorator recording calls, errors, in-flight calls and latency of one tool function."""
+
+    def decorator(fn: Callable) -> Callable:
+        labels = {"server": server, "tool": tool or fn.__name__}
+
+        def start() -> float:
+            if METRICS_DIR and _exporter is None:
+                start_exporter(METRICS_DIR)
+            tool_calls.inc(**labels)
+            tool_in_flight.inc(**labels)
+            return time.perf_counter()
+
+        def finish(started: float) -> None:
+            tool_in_flight.dec(**labels)
+            tool_latency.observe(time.perf_counter() - started, **labels)
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                started = start()
+                try:
+                    return await fn(*args, **kwargs)
+                except Exception:
+                    tool_errors.inc(**labels)
+                    raise
+                finally:
+                    finish(started)
+        else:
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                started = start()
+                try:
+                    return fn(*args, **kwargs)
+                except Exception:
+                    tool_errors.inc(**labels)
+                    raise
+                finally:
+                    finish(started)
+        return wrapper
+
+    return decorator
+
+
+def write_textfile(server: str, directory: str) -> None:
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{server}-{os.getpid()}.prom")
+    # Renamed into place so metrics_cli.py never reads a half-written file
+    with open(path + ".tmp", "w") as f:
+        f.write(registry.render(server))
+    os.replace(path + ".tmp", path)
+
+
+_exported: List[str] = []
+_exporter: Optional[threading.Thread] = None
+_exporter_lock = threading.Lock()
+
+
+def _export_forever(directory: str, interval: float) -> None:
+    while True:
+        for server in list(_exported):
+            try:
+                write_textfile(server, directory)
+            except OSError as e:
+                print(f"Was not able to write metrics for {server} due to {e}", file=sys.stderr)
+        time.sleep(interval)
+
+
+def start_exporter(directory: str, interval: float = METRICS_INTERVAL_SECONDS) -> threading.Thread:
+    """Rewrite the textfiles of every instrumented server in this process every `interval` seconds."""
+    global _exporter
+    with _exporter_lock:
+        if _exporter is None:
+            _exporter = threading.Thread(target=_export_forever, args=(directory, interval), name="metrics-export", daemon=True)
+            _exporter.start()
+        return _exporter
+
+
+def instrument(mcp: FastMCP) -> FastMCP:
+    """Meter every tool registered with `@mcp.tool()` from now on and add the `metrics://<server>` resource.
+
+    Call it right after creating the FastMCP app, before any tool is declared.
+    """
+    server = mcp.name
+    register_tool = mcp.tool
+
+    def tool(name: Optional[str] = None, *args, **kwargs):
+        register = register_tool(name, *args, **kwargs)
+        return lambda fn: register(metered(server, name)(fn))
+
+    mcp.tool = tool
+
+    @mcp.resource(f"metrics://{server}", name="metrics", mime_type="text/plain")
+    async def read_metrics_resource() -> str:
+        return registry.render(server)
+
+    if METRICS_DIR:
+        _exported.append(server)
+        atexit.register(write_textfile, server, METRICS_DIR)
+    return mcp
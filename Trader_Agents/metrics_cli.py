@@ -0,0 +1,79 @@
+"""Aggregate the Prometheus metrics exported by the local MCP servers.
+
+Every server started with METRICS_DIR set keeps `<server>-<pid>.prom` there up to date while it
+runs and writes it once more on exit. This reads those files and prints one exposition with
+samples of the same series summed: by default only the servers that are still running, with --all
+also the ones that have exited.
+
+Usage:
+    uv run metrics_cli.py --dir metrics          # running servers
+    uv run metrics_cli.py --dir metrics --all    # running and exited servers
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+from typing import Dict, List
+from metrics import METRICS_DIR, METRICS_INTERVAL_SECONDS
+
+# A running server rewrites its file every METRICS_INTERVAL_SECONDS; older files are from a
+# process that died without exiting cleanly (and whose pid may have been reused)
+STALE_INTERVALS = 3
+
+
+def is_running(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def read_textfiles(directory: str, running_only: bool = True) -> List[str]:
+    texts = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.prom"))):
+        if running_only:
+            pid = int(os.path.basename(path).removesuffix(".prom").rsplit("-", 1)[1])
+            fresh = time.time() - os.path.getmtime(path) < STALE_INTERVALS * METRICS_INTERVAL_SECONDS
+            if not (fresh and is_running(pid)):
+                continue
+        with open(path) as f:
+            texts.append(f.read())
+    return texts
+
+
+def aggregate(texts: List[str]) -> str:
+    """Merge expositions, summing samples that share a series name and label set."""
+    headers: Dict[str, List[str]] = {}
+    samples: Dict[str, Dict[str, float]] = {}
+    family = None
+    for text in texts:
+        for line in text.splitlines():
+            if line.startswith("# HELP ") or line.startswith("# TYPE "):
+                family = line.split()[2]
+                headers.setdefault(family, [])
+                if line not in headers[family]:
+                    headers[family].append(line)
+                samples.setdefault(family, {})
+            elif line.strip() and family is not None:
+                series, value = line.rsplit(" ", 1)
+                samples[family][series] = samples[family].get(series, 0.0) + float(value)
+    lines = []
+    for family, header in headers.items():
+        lines.extend(header)
+        for series, value in samples[family].items():
+            lines.append(f"{series} {int(value) if value.is_integer() else value}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Aggregate MCP server metrics in Prometheus text format")
+    parser.add_argument("--dir", default=METRICS_DIR, help="the METRICS_DIR the servers write to")
+    parser.add_argument("--all", action="store_true", help="include servers that have exited")
+    cli = parser.parse_args()
+    if not cli.dir:
+        sys.exit("Set METRICS_DIR (for the servers too) or pass --dir")
+    print(aggregate(read_textfiles(cli.dir, running_only=not cli.all)))
@@ -0,0 +1,229 @@
+import asyncio
+import os
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Tuple
+import httpx
+from dotenv import load_dotenv
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+from agents import Model, ModelResponse, OpenAIChatCompletionsModel, OpenAIResponsesModel
+from admission import AdmissionController, AdmittedModel, controller
+
+load_dotenv(override=True)
+
+DEEPSEEK_BASE_URL = "https://api.deepseek.com/v1"
+GROK_BASE_URL = "https://api.x.ai/v1"
+GEMINI_BASE_URL = "https://generativelanguage.googleapis.com/v1beta/openai/"
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+
+# Provider name -> (base url, api key env var); OpenAI uses the SDK defaults
+PROVIDERS: Dict[str, Tuple[Optional[str], str]] = {
+    "openai": (None, "OPENAI_API_KEY"),
+    "openrouter": (OPENROUTER_BASE_URL, "OPENROUTER_API_KEY"),
+    "deepseek": (DEEPSEEK_BASE_URL, "DEEPSEEK_API_KEY"),
+    "grok": (GROK_BASE_URL, "GROK_API_KEY"),
+    "gemini": (GEMINI_BASE_URL, "GOOGLE_API_KEY"),
+}
+
+MAX_CONNECTIONS = int(os.getenv("MODEL_MAX_CONNECTIONS", "20"))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("MODEL_MAX_KEEPALIVE_CONNECTIONS", "10"))
+REQUEST_TIMEOUT_SECONDS = float(os.getenv("MODEL_TIMEOUT_SECONDS", "120"))
+STATS_WINDOW = 100
+# Hedging: after HEDGE_AFTER_SECONDS without an answer (or the provider's rolling p95 when unset),
+# send the same request to HEDGE_MODEL on its own provider and take whichever answers first.
+# Until a provider has enough samples for a p95, HEDGE_DEFAULT_SECONDS is used.
+HEDGE_MODEL = os.getenv("HEDGE_MODEL")
+HEDGE_AFTER_SECONDS = float(os.getenv("HEDGE_AFTER_SECONDS")) if os.getenv("HEDGE_AFTER_SECONDS") else None
+HEDGE_DEFAULT_SECONDS = float(os.getenv("HEDGE_DEFAULT_SECONDS", "10"))
+MIN_HEDGE_SECONDS = 1.0
+MIN_SAMPLES_FOR_P95 = 10
+
+
+def provider_for(model_name: str) -> str:
+    if "/" in model_name:
+        return "openrouter"
+    elif "deepseek" in model_name:
+        return "deepseek"
+    elif "grok" in model_name:
+        return "grok"
+    elif "gemini" in model_name:
+        return "gemini"
+    else:
+        return "openai"
+
+
+@dataclass
+class ProviderStats:
+    """Rolling latency and error window for one provider."""
+
+    samples: Deque[Tuple[float, bool]] = field(default_factory=lambda: deque(maxlen=STATS_WINDOW))
+    hedges: int = 0
+    hedge_wins: int = 0
+
+    def record(self, latency: float, ok: bool) -> None:
+        self.samples.append((latency, ok))
+
+    def latency_percentile(self, pct: float) -> Optional[float]:
+        latencies = sorted(latency for latency, ok in self.samples if ok)
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(pct / 100 * len(latencies)))]
+
+    def error_rate(self) -> float:
+        if not self.samples:
+            return 0.0
+        return sum(1 for _, ok in self.samples if not ok) / len(self.samples)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "requests": len(self.samples),
+            "error_rate": round(self.error_rate(), 3),
+            "p50_seconds": self.latency_percentile(50),
+            "p95_seconds": self.latency_percentile(95),
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+        }
+
+
+class ModelRegistry:
+    """Shares one pooled AsyncOpenAI client per provider and tracks per-provider latency."""
+
+    def __init__(
+        self,
+        providers: Dict[str, Tuple[Optional[str], str]] = PROVIDERS,
+        max_connections: int = MAX_CONNECTIONS,
+        max_keepalive_connections: int = MAX_KEEPALIVE_CONNECTIONS,
+        timeout: float = REQUEST_TIMEOUT_SECONDS,
+        admission: Optional[AdmissionController] = None,
+    ):
+        self.providers = providers
+        self.admission = admission
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive_connections)
+        self.timeout = timeout
+        self.clients: Dict[str, AsyncOpenAI] = {}
+        self.stats: Dict[str, ProviderStats] = {}
+
+    def client(self, provider: str) -> AsyncOpenAI:
+        """Return the shared client for a provider, creating it on first use."""
+        if provider not in self.clients:
+            base_url, key_env = self.providers[provider]
+            self.clients[provider] = AsyncOpenAI(
+                base_url=base_url,
+                api_key=os.getenv(key_env),
+                timeout=self.timeout,
+                http_client=DefaultAsyncHttpxClient(limits=self.limits, timeout=self.timeout),
+            )
+        return self.clients[provider]
+
+    def provider_stats(self, provider: str) -> ProviderStats:
+        return self.stats.setdefault(provider, ProviderStats())
+
+    def hedge_threshold(self, provider: str, hedge_after: Optional[float]) -> float:
+        if hedge_after is not None:
+            return hedge_after
+        stats = self.provider_stats(provider)
+        p95 = stats.latency_percentile(95) if len(stats.samples) >= MIN_SAMPLES_FOR_P95 else None
+        return max(p95 or HEDGE_DEFAULT_SECONDS, MIN_HEDGE_SECONDS)
+
+    def raw_model(self, model_name: str) -> Model:
+        provider = provider_for(model_name)
+        if provider == "openai":
+            model = OpenAIResponsesModel(model=model_name, openai_client=self.client(provider))
+        else:
+            model = OpenAIChatCompletionsModel(model=model_name, openai_client=self.client(provider))
+        # Each raw model is admitted against its own provider's buckets, so hedges use the secondary's
+        # limits; queue time counts as latency, which lets a long queue trigger a hedge too
+        if self.admission is not None:
+            return AdmittedModel(model, provider, self.admission)
+        return model
+
+    def get_model(self, model_name: str, hedge_model: Optional[str] = HEDGE_MODEL, hedge_after: Optional[float] = HEDGE_AFTER_SECONDS) -> "TrackedModel":
+        hedge = None
+        if hedge_model and provider_for(hedge_model) != provider_for(model_name):
+            hedge = (hedge_model, self.raw_model(hedge_model))
+        return TrackedModel(self, model_name, self.raw_model(model_name), hedge, hedge_after)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {provider: stats.snapshot() for provider, stats in self.stats.items()}
+
+    async def aclose(self) -> None:
+        """Close the pooled connections of every client."""
+        for client in self.clients.values():
+            await client.close()
+        self.clients.clear()
+
+
+class TrackedModel(Model):
+    """Model that records latency/errors in the registry and optionally hedges to a secondary provider."""
+
+    def __init__(self, registry: ModelRegistry, model_name: str, model: Model, hedge: Optional[Tuple[str, Model]] = None, hedge_after: Optional[float] = None):
+        self.registry = registry
+        self.model_name = model_name
+        self.provider = provider_for(model_name)
+        self.model = model
+        self.hedge = hedge
+        self.hedge_after = hedge_after
+
+    async def _timed(self, provider: str, model: Model, args, kwargs) -> ModelResponse:
+        stats = self.registry.provider_stats(provider)
+        start = time.perf_counter()
+        try:
+            response = await model.get_response(*args, **kwargs)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            stats.record(time.perf_counter() - start, False)
+            raise
+        stats.record(time.perf_counter() - start, True)
+        return response
+
+    async def get_response(self, *args, **kwargs) -> ModelResponse:
+        if self.hedge is None:
+            return await self._timed(self.provider, self.model, args, kwargs)
+        start = time.perf_counter()
+        primary = asyncio.create_task(self._timed(self.provider, self.model, args, kwargs))
+        threshold = self.registry.hedge_threshold(self.provider, self.hedge_after)
+        done, _ = await asyncio.wait({primary}, timeout=threshold)
+        if primary in done and primary.exception() is None:
+            return primary.result()
+
+        # Primary is slow or failed: race it against the secondary provider
+        hedge_name, hedge_model = self.hedge
+        hedge_provider = provider_for(hedge_name)
+        self.registry.provider_stats(self.provider).hedges += 1
+        secondary = asyncio.create_task(self._timed(hedge_provider, hedge_model, args, kwargs))
+        pending = {secondary} if primary.done() else {primary, secondary}
+        error: BaseException | None = primary.exception() if primary.done() else None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is secondary:
+                            stats = self.registry.provider_stats(self.provider)
+                            stats.hedge_wins += 1
+                            if not primary.done():
+                                # The primary is cancelled below; its elapsed time counts as a
+                                # timeout, so a provider that keeps losing shows in its error rate
+                                stats.record(time.perf_counter() - start, False)
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def stream_response(self, *args, **kwargs) -> AsyncIterator[Any]:
+        stats = self.registry.provider_stats(self.provider)
+        start = time.perf_counter()
+        try:
+            async for event in self.model.stream_response(*args, **kwargs):
+                yield event
+        except Exception:
+            stats.record(time.perf_counter() - start, False)
+            raise
+        stats.record(time.perf_counter() - start, True)
+
+
+registry = ModelRegistry(admission=controller)
@@ -0,0 +1,283 @@
+import asyncio
+import dataclasses
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+from typing import Any, AsyncIterator, List, Optional, Tuple
+from dotenv import load_dotenv
+from pydantic import BaseModel, TypeAdapter
+from openai.types.responses import (
+    Response,
+    ResponseCompletedEvent,
+    ResponseOutputItem,
+    ResponseTextDeltaEvent,
+    ResponseUsage,
+)
+from openai.types.responses.response_usage import InputTokensDetails, OutputTokensDetails
+from agents import Model, ModelProvider, ModelResponse, OpenAIProvider, Usage
+
+load_dotenv(override=True)
+
+# MODEL_MODE: "live" (default) calls the providers directly, "record" calls them and stores every
+# response, "replay" answers from the store without any network access.
+MODEL_MODES = ("live", "record", "replay")
+MODEL_MODE = os.getenv("MODEL_MODE", "live")
+MODEL_STORE = os.getenv("MODEL_STORE", "model_responses.db")
+# MODEL_REPLAY_LATENCY: unset for no delay, "recorded" to sleep as long as the live call took,
+# or a number of seconds to sleep before every replayed response.
+MODEL_REPLAY_LATENCY = os.getenv("MODEL_REPLAY_LATENCY")
+# MODEL_REPLAY_MATCH: "exact" (default) only replays a response recorded for exactly the same
+# request; "turn" falls back to the latest response recorded for the same agent and turn when
+# tool results (prices, balances) differ from the recording.
+MODEL_REPLAY_MATCHES = ("exact", "turn")
+MODEL_REPLAY_MATCH = os.getenv("MODEL_REPLAY_MATCH", "exact")
+
+
+def check_mode(mode: str) -> str:
+    if mode not in MODEL_MODES:
+        raise ValueError(f"Unknown MODEL_MODE {mode!r}; use one of {', '.join(MODEL_MODES)}")
+    return mode
+
+
+def check_match(match: str) -> str:
+    if match not in MODEL_REPLAY_MATCHES:
+        raise ValueError(f"Unknown MODEL_REPLAY_MATCH {match!r}; use one of {', '.join(MODEL_REPLAY_MATCHES)}")
+    return match
+
+
+check_mode(MODEL_MODE)
+check_match(MODEL_REPLAY_MATCH)
+
+TIMESTAMP = re.compile(r"\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}(\.\d+)?")
+output_items = TypeAdapter(List[ResponseOutputItem])
+
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(exclude_unset=True)
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return {f.name: _jsonable(getattr(value, f.name)) for f in dataclasses.fields(value)}
+    if isinstance(value, dict):
+        return {str(k): _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+def _digest(payload: Any) -> str:
+    text = json.dumps(payload, sort_keys=True, default=str)
+    # Prompts embed the current datetime; mask it so the same request hashes the same every run
+    return hashlib.sha256(TIMESTAMP.sub("<datetime>", text).encode()).hexdigest()
+
+
+def request_keys(model_name, system_instructions, input, model_settings, tools, output_schema, handoffs) -> Tuple[str, str]:
+    """Return (exact key, turn key) for a model request.
+
+    The exact key hashes everything the model sees. The turn key only hashes the model, the
+    instructions, the tools and how many items the conversation has; replays fall back to it
+    only with MODEL_REPLAY_MATCH=turn.
+    """
+    items = [{"role": "user", "content": input}] if isinstance(input, str) else _jsonable(input)
+    tool_specs = [
+        {"name": tool.name, "params": getattr(tool, "params_json_schema", None)}
+        for tool in tools
+    ]
+    schema = None
+    if output_schema is not None and not output_schema.is_plain_text():
+        schema = output_schema.json_schema()
+    shared = {
+        "model": model_name,
+        "instructions": system_instructions,
+        "tools": tool_specs,
+        "handoffs": [handoff.tool_name for handoff in handoffs],
+        "schema": schema,
+    }
+    exact = _digest({**shared, "input": items, "settings": _jsonable(model_settings)})
+    turn = _digest({**shared, "turn": len(items)})
+    return exact, turn
+
+
+class ResponseStore:
+    """SQLite table of recorded model responses, keyed by request hash."""
+
+    def __init__(self, db_path: str = MODEL_STORE):
+        self.db_path = db_path
+        with sqlite3.connect(db_path) as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, turn_key TEXT, model TEXT, output TEXT, usage TEXT, latency REAL, recorded_at DATETIME)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_turn ON responses (turn_key)")
+            conn.commit()
+
+    def put(self, key: str, turn_key: str, model: str, response: ModelResponse, latency: float) -> None:
+        output = json.dumps([item.model_dump() for item in response.output])
+        usage = json.dumps({
+            "requests": response.usage.requests,
+            "input_tokens": response.usage.input_tokens,
+            "output_tokens": response.usage.output_tokens,
+            "total_tokens": response.usage.total_tokens,
+        })
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute(
+                """
+                INSERT INTO responses (key, turn_key, model, output, usage, latency, recorded_at)
+                VALUES (?, ?, ?, ?, ?, ?, datetime('now'))
+                ON CONFLICT(key) DO UPDATE SET output=excluded.output, usage=excluded.usage,
+                    latency=excluded.latency, recorded_at=excluded.recorded_at
+                """,
+                (key, turn_key, model, output, usage, latency),
+            )
+            conn.commit()
+
+    def get(self, key: str, turn_key: str, match: str = "exact") -> Optional[Tuple[ModelResponse, float]]:
+        """Return the response recorded for `key`, or with match="turn" the latest one for `turn_key`."""
+        with sqlite3.connect(self.db_path) as conn:
+            row = conn.execute("SELECT output, usage, latency FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None and match == "turn":
+                row = conn.execute(
+                    "SELECT output, usage, latency FROM responses WHERE turn_key = ? ORDER BY recorded_at DESC LIMIT 1",
+                    (turn_key,),
+                ).fetchone()
+        if row is None:
+            return None
+        output, usage, latency = row
+        response = ModelResponse(
+            output=output_items.validate_python(json.loads(output)),
+            usage=Usage(**json.loads(usage)),
+            response_id=None,
+        )
+        return response, latency
+
+
+class RecordReplayModel(Model):
+    """Model stand-in that records live responses or replays them from a ResponseStore."""
+
+    def __init__(
+        self,
+        model_name: str,
+        mode: str,
+        store: ResponseStore,
+        inner: Model | None = None,
+        latency: str | float | None = None,
+        match: str = MODEL_REPLAY_MATCH,
+    ):
+        if check_mode(mode) == "record" and inner is None:
+            raise ValueError("Recording needs the live model to call")
+        self.model_name = model_name
+        self.mode = mode
+        self.store = store
+        self.inner = inner
+        self.latency = latency
+        self.match = check_match(match)
+
+    async def _replay(self, keys: Tuple[str, str]) -> ModelResponse:
+        hit = self.store.get(*keys, match=self.match)
+        if hit is None:
+            raise LookupError(
+                f"No recorded response for {self.model_name} request {keys[0][:12]}; "
+                f"run once with MODEL_MODE=record to capture it, or set MODEL_REPLAY_MATCH=turn to reuse "
+                f"the response recorded for the same turn"
+            )
+        response, recorded_latency = hit
+        delay = recorded_latency if self.latency == "recorded" else self.latency
+        if delay:
+            await asyncio.sleep(float(delay))
+        return response
+
+    async def get_response(self, system_instructions, input, model_settings, tools, output_schema, handoffs, tracing, *, previous_response_id=None) -> ModelResponse:
+        keys = request_keys(self.model_name, system_instructions, input, model_settings, tools, output_schema, handoffs)
+        if self.mode == "replay":
+            return await self._replay(keys)
+        start = time.perf_counter()
+        response = await self.inner.get_response(
+            system_instructions, input, model_settings, tools, output_schema, handoffs, tracing,
+            previous_response_id=previous_response_id,
+        )
+        self.store.put(*keys, self.model_name, response, time.perf_counter() - start)
+        return response
+
+    async def stream_response(self, system_instructions, input, model_settings, tools, output_schema, handoffs, tracing, *, previous_response_id=None) -> AsyncIterator[Any]:
+        keys = request_keys(self.model_name, system_instructions, input, model_settings, tools, output_schema, handoffs)
+        if self.mode == "replay":
+            response = await self._replay(keys)
+            sequence = 0
+            for index, item in enumerate(response.output):
+                for part in getattr(item, "content", None) or []:
+                    if getattr(part, "type", None) == "output_text":
+                        yield ResponseTextDeltaEvent(
+                            content_index=0, delta=part.text, item_id=item.id, output_index=index,
+                            sequence_number=sequence, type="response.output_text.delta",
+                        )
+                        sequence += 1
+            yield ResponseCompletedEvent(
+                response=Response(
+                    id="replay", created_at=time.time(), model=self.model_name, object="response",
+                    output=response.output, tool_choice="auto", tools=[], parallel_tool_calls=False,
+                    usage=ResponseUsage(
+                        input_tokens=response.usage.input_tokens,
+                        input_tokens_details=InputTokensDetails(cached_tokens=0),
+                        output_tokens=response.usage.output_tokens,
+                        output_tokens_details=OutputTokensDetails(reasoning_tokens=0),
+                        total_tokens=response.usage.total_tokens,
+                    ),
+                ),
+                sequence_number=sequence,
+                type="response.completed",
+            )
+            return
+        start = time.perf_counter()
+        async for event in self.inner.stream_response(
+            system_instructions, input, model_settings, tools, output_schema, handoffs, tracing,
+            previous_response_id=previous_response_id,
+        ):
+            if isinstance(event, ResponseCompletedEvent):
+                usage = event.response.usage
+                recorded = ModelResponse(
+                    output=event.response.output,
+                    usage=Usage(
+                        requests=1,
+                        input_tokens=usage.input_tokens if usage else 0,
+                        output_tokens=usage.output_tokens if usage else 0,
+                        total_tokens=usage.total_tokens if usage else 0,
+                    ),
+                    response_id=event.response.id,
+                )
+                self.store.put(*keys, self.model_name, recorded, time.perf_counter() - start)
+            yield event
+
+
+def replay_latency() -> str | float | None:
+    if not MODEL_REPLAY_LATENCY or MODEL_REPLAY_LATENCY == "recorded":
+        return MODEL_REPLAY_LATENCY
+    return float(MODEL_REPLAY_LATENCY)
+
+
+def wrap_model(model_name: str, model: Model | str, mode: str = MODEL_MODE, store: ResponseStore | None = None) -> Model | str:
+    """Wrap a model (or a plain OpenAI model name) for recording or replay; live mode returns it unchanged."""
+    if check_mode(mode) == "live":
+        return model
+    inner = None
+    if mode == "record":
+        inner = model if isinstance(model, Model) else OpenAIProvider().get_model(model)
+    return RecordReplayModel(model_name, mode, store or ResponseStore(), inner, replay_latency())
+
+
+class RecordReplayProvider(ModelProvider):
+    """ModelProvider for RunConfig, so agents declared with a model name string are recorded or replayed too."""
+
+    def __init__(self, mode: str = MODEL_MODE, store: ResponseStore | None = None):
+        self.mode = check_mode(mode)
+        self.store = store or (ResponseStore() if mode != "live" else None)
+        self.live = OpenAIProvider()
+
+    def get_model(self, model_name: str | None) -> Model:
+        if self.mode == "live":
+            return self.live.get_model(model_name)
+        name = model_name or "default"
+        inner = self.live.get_model(model_name) if self.mode == "record" else None
+        return RecordReplayModel(name, self.mode, self.store, inner, replay_latency())
@@ -0,0 +1,76 @@
+"""Measure cold start of the local MCP servers.
+
+For every server this reports the module import time (from `python -X importtime`, with the
+heaviest imports it pulls in) and the time-to-first-response: spawning the server over stdio and
+completing initialize + list_tools, which is what a trader pays before its first tool call.
+
+Usage:
+    uv run profile_startup.py                  # all local servers, median of 3 spawns
+    uv run profile_startup.py accounts_server --runs 5 --top 8
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+
+SERVERS = ["accounts_server", "market_server", "push_server", "memory_server", "fetch_server", "search_server"]
+
+
+def import_profile(module: str) -> Tuple[float, List[Tuple[float, str]]]:
+    """Total import seconds of a module in a fresh interpreter, and its heaviest (cumulative) imports."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True,
+    )
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((int(cumulative) / 1e6, name.strip(), depth))
+    total = next((seconds for seconds, name, depth in entries if name == module), 0.0)
+    # The module's direct imports (modules already loaded by an earlier import are not listed)
+    heaviest = sorted(((seconds, name) for seconds, name, depth in entries if depth == 1), reverse=True)
+    return total, heaviest
+
+
+async def first_response(module: str) -> float:
+    start = time.perf_counter()
+    params = StdioServerParameters(command=sys.executable, args=[f"{module}.py"])
+    async with stdio_client(params, errlog=open(os.devnull, "w")) as (read, write):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            await session.list_tools()
+            return time.perf_counter() - start
+
+
+def profile(module: str, runs: int, top: int) -> Dict:
+    total, heaviest = import_profile(module)
+    spawns = [asyncio.run(first_response(module)) for _ in range(runs)]
+    return {
+        "server": module,
+        "import_seconds": total,
+        "first_response_seconds": statistics.median(spawns),
+        "heaviest_imports": heaviest[:top],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import time and time-to-first-response of the MCP servers")
+    parser.add_argument("servers", nargs="*", default=SERVERS)
+    parser.add_argument("--runs", type=int, default=3, help="stdio spawns per server (median reported)")
+    parser.add_argument("--top", type=int, default=5, help="heaviest imports to list per server")
+    cli = parser.parse_args()
+    print(f"{'server':16} {'import':>8} {'first response':>15}")
+    for server in cli.servers:
+        result = profile(server, cli.runs, cli.top)
+        print(f"{server:16} {result['import_seconds'] * 1000:6.0f}ms {result['first_response_seconds'] * 1000:13.0f}ms")
+        for seconds, name in result["heaviest_imports"]:
+            print(f"    {seconds * 1000:6.0f}ms  {name}")
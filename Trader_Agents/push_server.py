@@ -1,9 +1,10 @@
 from mcp.server.fastmcp import FastMCP
+from metrics import instrument
 from typing import Optional
 from datetime import datetime
 
 
-mcp = FastMCP("push_server")
+mcp = instrument(FastMCP("push_server"))
 
 
 @mcp.tool()
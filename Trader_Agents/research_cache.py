@@ -0,0 +1,106 @@
+import asyncio
+import os
+import re
+from typing import Dict, Optional
+from dotenv import load_dotenv
+from agents import Agent, ItemHelpers, RunContextWrapper, Runner, Tool, function_tool
+from database import read_research, write_research, read_research_cache_stats
+
+load_dotenv(override=True)
+
+# Research results are shared by every trader using the same accounts.db (including fleet workers)
+RESEARCH_CACHE_TTL_SECONDS = int(os.getenv("RESEARCH_CACHE_TTL_SECONDS", "1800"))
+RESEARCH_CACHE_MAX_ENTRIES = int(os.getenv("RESEARCH_CACHE_MAX_ENTRIES", "500"))
+
+TICKER = re.compile(r"\$([A-Za-z]{1,5})\b|\b([A-Z]{1,5})\b")
+NOT_TICKERS = {
+    "A", "I", "AI", "AN", "AND", "AT", "BY", "CEO", "CPI", "EPS", "ETF", "ETFS", "FED", "FOR", "GDP",
+    "IN", "IPO", "IS", "IT", "NEWS", "OF", "ON", "OR", "THE", "TO", "UK", "US", "USA", "USD",
+}
+FILLER_WORDS = {
+    "a", "about", "an", "and", "any", "are", "at", "find", "for", "in", "is", "latest", "look", "me",
+    "news", "of", "on", "please", "recent", "research", "the", "to", "today", "what", "with",
+}
+
+
+def cache_key(query: str) -> str:
+    """Normalize a research request to the tickers it names or, failing that, its topic words."""
+    tickers = sorted({
+        (explicit or bare).upper()
+        for explicit, bare in TICKER.findall(query)
+        if explicit or bare not in NOT_TICKERS
+    })
+    if tickers:
+        return "tickers:" + ",".join(tickers)
+    words = sorted(set(re.findall(r"[a-z0-9]+", query.lower())) - FILLER_WORDS)
+    return "topic:" + " ".join(words)
+
+
+class ResearchCache:
+    """Fresh research results by cache key, with in-flight requests for the same key coalesced."""
+
+    def __init__(self, ttl_seconds: int = RESEARCH_CACHE_TTL_SECONDS, max_entries: int = RESEARCH_CACHE_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.in_flight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    async def get_or_research(self, query: str, research) -> str:
+        key = cache_key(query)
+        cached = read_research(key, self.ttl_seconds)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        if key in self.in_flight:
+            # Another trader in this process is researching the same thing right now
+            self.coalesced += 1
+            return await asyncio.shield(self.in_flight[key])
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self.in_flight[key] = future
+        try:
+            result = await research(query)
+            if result:
+                write_research(key, query, result, self.max_entries)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved when nobody else is waiting
+            raise
+        finally:
+            del self.in_flight[key]
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": round((self.hits + self.coalesced) / lookups, 3) if lookups else 0.0,
+            **read_research_cache_stats(),
+        }
+
+
+cache = ResearchCache()
+
+
+def cached_research_tool(researcher: Agent, tool_name: str, tool_description: str, research_cache: Optional[ResearchCache] = None) -> Tool:
+    """Like `researcher.as_tool`, but answered from the shared cache while the research is fresh."""
+    research_cache = research_cache or cache
+
+    @function_tool(name_override=tool_name, description_override=tool_description)
+    async def run_researcher(context: RunContextWrapper, input: str) -> str:
+        async def research(query: str) -> str:
+            output = await Runner.run(starting_agent=researcher, input=query, context=context.context)
+            return ItemHelpers.text_message_outputs(output.new_items)
+
+        return await research_cache.get_or_research(input, research)
+
+    return run_researcher
+
+
+if __name__ == "__main__":
+    print(read_research_cache_stats())
@@ -1,4 +1,5 @@
 from mcp.server.fastmcp import FastMCP
+from metrics import instrument
 from typing import List, Dict, Any
 import asyncio
 
@@ -8,7 +9,7 @@ except Exception:  # pragma: no cover
     DDGS = None  # type: ignore
 
 
-mcp = FastMCP("search_server")
+mcp = instrument(FastMCP("search_server"))
 
 
 @mcp.tool()
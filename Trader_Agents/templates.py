@@ -58,7 +58,8 @@ You do not need to rebalance your portfolio; you will be asked to do so later.
 Just make trades based on your strategy as needed.
 Your investment strategy:
 {strategy}
-Here is your current account:
+Here is a summary of your current account, with only your most recent transactions
+(use your query_transactions and transaction_totals tools to look further back):
 {account}
 Here is the current datetime:
 {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
@@ -77,7 +78,8 @@ Just rebalance your portfolio based on your strategy as needed.
 Your investment strategy:
 {strategy}
 You also have a tool to change your strategy if you wish; you can decide at any time that you would like to evolve or even switch your strategy.
-Here is your current account:
+Here is a summary of your current account, with only your most recent transactions
+(use your query_transactions and transaction_totals tools to look further back):
 {account}
 Here is the current datetime:
 {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
@@ -1,13 +1,17 @@
+import asyncio
+import os
 from contextlib import AsyncExitStack
-from typing import Any, List
-from accounts_mcp_client import read_accounts_resource, read_strategy_resource
+from typing import Any, List, Tuple
+from accounts_mcp_client import read_summary_resource, read_strategy_resource
 from tracing import make_trace_id
-from agents import Agent, Tool, Runner, OpenAIChatCompletionsModel, trace
-from openai import AsyncOpenAI
+from agents import Agent, Model, Tool, Runner, trace
 from dotenv import load_dotenv
-import os
-import json
-from agents.mcp import MCPServerStdio
+from mcp_inprocess import create_mcp_server
+from model_replay import MODEL_MODE, wrap_model
+from model_registry import registry
+from admission import lane
+from research_cache import cached_research_tool
+from market_calendar import is_session_open, next_session_open, now_in_market_tz
 from prompts import (
     researcher_instructions,
     trader_instructions,
@@ -19,35 +23,37 @@ from mcp_config import trader_mcp_server_params, researcher_mcp_server_params
 
 load_dotenv(override=True)
 
-deepseek_api_key = os.getenv("DEEPSEEK_API_KEY")
-google_api_key = os.getenv("GOOGLE_API_KEY")
-grok_api_key = os.getenv("GROK_API_KEY")
-openrouter_api_key = os.getenv("OPENROUTER_API_KEY")
+MAX_TURNS = 30
+# MARKET_HOURS_GATE: "skip" skips runs outside the configured TRADING_SESSION, "defer" delays them
+# until the session opens (if that is within MAX_DEFER_SECONDS), or "off" to always run
+MARKET_HOURS_GATE = os.getenv("MARKET_HOURS_GATE", "skip")
+MAX_DEFER_SECONDS = int(os.getenv("MAX_DEFER_SECONDS", "3600"))
 
-DEEPSEEK_BASE_URL = "https://api.deepseek.com/v1"
-GROK_BASE_URL = "https://api.x.ai/v1"
-GEMINI_BASE_URL = "https://generativelanguage.googleapis.com/v1beta/openai/"
-OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
 
-MAX_TURNS = 30
+def get_model(model_name: str) -> Model | str:
+    if MODEL_MODE == "replay":
+        # Answered from the response store; no provider client is needed
+        return wrap_model(model_name, model_name)
+    # Pooled per-provider clients with latency tracking (and hedging when HEDGE_MODEL is set)
+    model = registry.get_model(model_name)
+    # Record responses when MODEL_MODE is "record"
+    return wrap_model(model_name, model)
 
-openrouter_client = AsyncOpenAI(base_url=OPENROUTER_BASE_URL, api_key=openrouter_api_key)
-deepseek_client = AsyncOpenAI(base_url=DEEPSEEK_BASE_URL, api_key=deepseek_api_key)
-grok_client = AsyncOpenAI(base_url=GROK_BASE_URL, api_key=grok_api_key)
-gemini_client = AsyncOpenAI(base_url=GEMINI_BASE_URL, api_key=google_api_key)
 
+McpServers = Tuple[List[Any], List[Any]]
 
-def get_model(model_name: str) -> OpenAIChatCompletionsModel | str:
-    if "/" in model_name:
-        return OpenAIChatCompletionsModel(model=model_name, openai_client=openrouter_client)
-    elif "deepseek" in model_name:
-        return OpenAIChatCompletionsModel(model=model_name, openai_client=deepseek_client)
-    elif "grok" in model_name:
-        return OpenAIChatCompletionsModel(model=model_name, openai_client=grok_client)
-    elif "gemini" in model_name:
-        return OpenAIChatCompletionsModel(model=model_name, openai_client=gemini_client)
-    else:
-        return model_name
+
+async def open_mcp_servers(stack: AsyncExitStack, name: str) -> McpServers:
+    """Connect the trader and researcher MCP servers, closed when the stack exits."""
+    trader_mcp_servers = [
+        await stack.enter_async_context(create_mcp_server(params, client_session_timeout_seconds=120))
+        for params in trader_mcp_server_params
+    ]
+    researcher_mcp_servers = [
+        await stack.enter_async_context(create_mcp_server(params, client_session_timeout_seconds=120))
+        for params in researcher_mcp_server_params(name)
+    ]
+    return trader_mcp_servers, researcher_mcp_servers
 
 
 async def get_researcher(mcp_servers: List[Any], model_name: str) -> Agent:
@@ -62,7 +68,8 @@ async def get_researcher(mcp_servers: List[Any], model_name: str) -> Agent:
 
 async def get_researcher_tool(mcp_servers: List[Any], model_name: str) -> Tool:
     researcher = await get_researcher(mcp_servers, model_name)
-    return researcher.as_tool(tool_name="Researcher", tool_description=research_tool())
+    # Fresh research on the same tickers or topic is shared across traders instead of repeated
+    return cached_research_tool(researcher, tool_name="Researcher", tool_description=research_tool())
 
 
 class Trader:
@@ -72,6 +79,7 @@ class Trader:
         self.agent: Agent | None = None
         self.model_name: str = model_name
         self.do_trade: bool = True
+        self.last_error: str | None = None
 
     async def create_agent(self, trader_mcp_servers: List[Any], researcher_mcp_servers: List[Any]) -> Agent:
         tool = await get_researcher_tool(researcher_mcp_servers, self.model_name)
@@ -85,10 +93,7 @@ class Trader:
         return self.agent
 
     async def get_account_report(self) -> str:
-        account = await read_accounts_resource(self.name)
-        account_json = json.loads(account)
-        account_json.pop("portfolio_value_time_series", None)
-        return json.dumps(account_json)
+        return await read_summary_resource(self.name)
 
     async def run_agent(self, trader_mcp_servers: List[Any], researcher_mcp_servers: List[Any]) -> None:
         self.agent = await self.create_agent(trader_mcp_servers, researcher_mcp_servers)
@@ -99,34 +104,48 @@ class Trader:
             if self.do_trade
             else rebalance_message(self.name, strategy, account)
         )
-        await Runner.run(self.agent, message, max_turns=MAX_TURNS)
+        # Trades are admitted ahead of rebalances when providers are rate limited
+        with lane("trade" if self.do_trade else "rebalance"):
+            await Runner.run(self.agent, message, max_turns=MAX_TURNS)
 
     async def run_with_mcp_servers(self) -> None:
         async with AsyncExitStack() as stack:
-            trader_mcp_servers = [
-                await stack.enter_async_context(
-                    MCPServerStdio(params, client_session_timeout_seconds=120)
-                )
-                for params in trader_mcp_server_params
-            ]
-            async with AsyncExitStack() as stack:
-                researcher_mcp_servers = [
-                    await stack.enter_async_context(
-                        MCPServerStdio(params, client_session_timeout_seconds=120)
-                    )
-                    for params in researcher_mcp_server_params(self.name)
-                ]
-                await self.run_agent(trader_mcp_servers, researcher_mcp_servers)
-
-    async def run_with_trace(self) -> None:
+            await self.run_agent(*await open_mcp_servers(stack, self.name))
+
+    async def run_with_trace(self, mcp_servers: McpServers | None = None) -> None:
+        """Run one cycle, on the given (trader, researcher) MCP servers or on a fresh set."""
         trace_name = f"{self.name}-trading" if self.do_trade else f"{self.name}-rebalancing"
         trace_id = make_trace_id(f"{self.name.lower()}")
         with trace(trace_name, trace_id=trace_id):
-            await self.run_with_mcp_servers()
-
-    async def run(self) -> None:
+            if mcp_servers is None:
+                await self.run_with_mcp_servers()
+            else:
+                await self.run_agent(*mcp_servers)
+
+    async def wait_for_session(self) -> bool:
+        """Apply the market-hours gate: True if the run should go ahead now."""
+        if MARKET_HOURS_GATE == "off" or is_session_open():
+            return True
+        if MARKET_HOURS_GATE == "defer":
+            opens = next_session_open()
+            delay = (opens - now_in_market_tz()).total_seconds() if opens else None
+            if delay is not None and delay <= MAX_DEFER_SECONDS:
+                await asyncio.sleep(delay)
+                return True
+        return False
+
+    async def run(self, mcp_servers: McpServers | None = None) -> str:
+        """Run one trading or rebalancing cycle; returns "completed", "failed" or "skipped"."""
+        self.last_error = None
+        if not await self.wait_for_session():
+            # do_trade is not flipped, so the skipped kind of run happens in the next session
+            kind = "trading" if self.do_trade else "rebalancing"
+            print(f"Market closed; skipping {self.name}'s {kind} run (set MARKET_HOURS_GATE=off to run anyway)")
+            return "skipped"
         try:
-            await self.run_with_trace()
+            await self.run_with_trace(mcp_servers)
         except Exception as e:
             print(f"Error running trader {self.name}: {e}")
+            self.last_error = str(e)
         self.do_trade = not self.do_trade
+        return "failed" if self.last_error else "completed"